@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 
-import threading
+import asyncio
 import time
 import random
 import json
+import os
+import heapq
+from operator import itemgetter
 from datetime import datetime
 from .game_client import GameClient
 
@@ -17,7 +20,7 @@ class GameClientManager:
         self.duration = duration
         self.connections_per_player = connections_per_player  # Multiple concurrent connections per player
         self.clients = []
-        self.threads = []
+        self.tasks = []
         self.session_start_time = None
         self.session_end_time = None
         
@@ -27,29 +30,29 @@ class GameClientManager:
         total_connections = self.num_players * self.connections_per_player
         print(f"=== Starting {self.num_players} Player Simulation ({total_connections} total connections) at {datetime.now()} ===")
         
-        # Create multiple connection threads per player
+        # All connections share one event loop instead of one OS thread each
+        asyncio.run(self._run_clients())
+            
+        self.session_end_time = time.time()
+        session_duration = self.session_end_time - self.session_start_time if self.session_start_time else 0
+        print(f"All connections finished at {datetime.now()}")
+        print(f"Session duration: {session_duration:.1f} seconds")
+        
+    async def _run_clients(self):
+        """Create every client connection and run them concurrently until all finish."""
+        # Create multiple connections per player
         for player_id in range(1, self.num_players + 1):
             for connection_id in range(1, self.connections_per_player + 1):
                 # Create a unique client instance for each connection
                 client = GameClient(f"{player_id}-{connection_id}", self.server_ip)
                 self.clients.append(client)
-                
-                thread = threading.Thread(target=client.simulate_game_traffic)
-                thread.daemon = True
-                self.threads.append(thread)
-                thread.start()
+                self.tasks.append(asyncio.create_task(client.simulate_game_traffic()))
                 
                 # Minimal stagger to avoid overwhelming connection setup
-                time.sleep(random.uniform(0.01, 0.05))
+                await asyncio.sleep(random.uniform(0.01, 0.05))
             
-        # Wait for all threads to complete
-        for thread in self.threads:
-            thread.join()
-            
-        self.session_end_time = time.time()
-        session_duration = self.session_end_time - self.session_start_time if self.session_start_time else 0
-        print(f"All connections finished at {datetime.now()}")
-        print(f"Session duration: {session_duration:.1f} seconds")
+        # Wait for all connections to complete
+        await asyncio.gather(*self.tasks)
         
     def generate_report(self):
         """Generate comprehensive client-side report"""
@@ -57,8 +60,9 @@ class GameClientManager:
         print("CLIENT SIMULATION REPORT")
         print("="*60)
         
-        # Aggregate statistics
-        total_stats = self._calculate_aggregate_stats()
+        # Aggregate statistics; the top-player rows come from the same pass
+        players = []
+        total_stats = self._calculate_aggregate_stats(players)
         
         # Calculate rates and percentages
         udp_success_rate = self._calculate_udp_success_rate(total_stats)
@@ -68,29 +72,57 @@ class GameClientManager:
         self._print_traffic_summary(total_stats, udp_success_rate, tcp_success_rate)
         self._print_bandwidth_info(total_stats)
         self._print_performance_metrics(total_stats)
-        self._print_top_players()
+        self._print_top_players(players)
         
         # Save detailed report to file
         self._save_json_report(total_stats)
         
-    def _calculate_aggregate_stats(self):
-        """Calculate aggregated statistics from all clients."""
-        all_pings = [p for c in self.clients for p in c.stats.ping_times if p is not None]
+    def _calculate_aggregate_stats(self, players=None):
+        """Calculate aggregated statistics from all clients.
+        
+        If `players` is a list, one (udp_packets_sent, tcp_connections, error_count,
+        player_id) row per client is appended to it from the same reading.
+        """
+        # One pass over the clients with local accumulators
+        tcp_connections = tcp_failed = 0
+        udp_packets = udp_responses = udp_timeouts = 0
+        bytes_sent = bytes_received = errors = 0
+        # Per-client running aggregates cover every ping, including samples trimmed from history
+        ping_count = 0
+        ping_min = ping_max = None
+        ping_sum = 0.0
+        for c in self.clients:
+            s = c.stats
+            tcp_connections += s.tcp_connections
+            tcp_failed += s.tcp_failed
+            udp_packets += s.udp_packets_sent
+            udp_responses += s.udp_responses
+            udp_timeouts += s.udp_timeouts
+            bytes_sent += s.total_bytes_sent
+            bytes_received += s.total_bytes_received
+            errors += s.error_count
+            if s.ping_count:
+                ping_count += s.ping_count
+                ping_sum += s.ping_sum
+                ping_min = s.ping_min if ping_min is None else min(ping_min, s.ping_min)
+                ping_max = s.ping_max if ping_max is None else max(ping_max, s.ping_max)
+            if players is not None:
+                players.append((s.udp_packets_sent, s.tcp_connections, s.error_count, s.player_id))
         
         return {
             'total_players': len(self.clients),
-            'total_tcp_connections': sum(c.stats.tcp_connections for c in self.clients),
-            'total_tcp_failed': sum(c.stats.tcp_failed for c in self.clients),
-            'total_udp_packets': sum(c.stats.udp_packets_sent for c in self.clients),
-            'total_udp_responses': sum(c.stats.udp_responses for c in self.clients),
-            'total_udp_timeouts': sum(c.stats.udp_timeouts for c in self.clients),
-            'total_bytes_sent': sum(c.stats.total_bytes_sent for c in self.clients),
-            'total_bytes_received': sum(c.stats.total_bytes_received for c in self.clients),
-            'total_errors': sum(len(c.stats.errors) for c in self.clients),
-            'ping_min_ms': min(all_pings) if all_pings else None,
-            'ping_max_ms': max(all_pings) if all_pings else None,
-            'ping_avg_ms': sum(all_pings)/len(all_pings) if all_pings else None,
-            'ping_count': len(all_pings)
+            'total_tcp_connections': tcp_connections,
+            'total_tcp_failed': tcp_failed,
+            'total_udp_packets': udp_packets,
+            'total_udp_responses': udp_responses,
+            'total_udp_timeouts': udp_timeouts,
+            'total_bytes_sent': bytes_sent,
+            'total_bytes_received': bytes_received,
+            'total_errors': errors,
+            'ping_min_ms': ping_min,
+            'ping_max_ms': ping_max,
+            'ping_avg_ms': ping_sum/ping_count if ping_count else None,
+            'ping_count': ping_count
         }
     
     def _calculate_udp_success_rate(self, total_stats):
@@ -148,12 +180,12 @@ class GameClientManager:
             print("  Ping (ms): No data")
         print()
     
-    def _print_top_players(self):
-        """Print top 5 most active players."""
+    def _print_top_players(self, players):
+        """Print top 5 most active players from the (udp, tcp, errors, player_id) rows."""
         print("TOP 5 MOST ACTIVE PLAYERS:")
-        sorted_clients = sorted(self.clients, key=lambda c: c.stats.udp_packets_sent, reverse=True)
-        for client in sorted_clients[:5]:
-            print(f"  Player {client.stats.player_id}: {client.stats.udp_packets_sent} UDP, {client.stats.tcp_connections} TCP, {len(client.stats.errors)} errors")
+        # Rank on rows read once, so values can't change mid-selection
+        for udp_sent, tcp_connections, error_count, player_id in heapq.nlargest(5, players, key=itemgetter(0)):
+            print(f"  Player {player_id}: {udp_sent} UDP, {tcp_connections} TCP, {error_count} errors")
         print()
         
     def _save_json_report(self, summary_stats):
@@ -180,8 +212,15 @@ class GameClientManager:
         
         filename = f"/shared/client-report-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
         try:
-            with open(filename, 'w') as f:
-                json.dump(report_data, f, indent=2)
+            # Serialize once and hand the whole payload to the kernel in a single write
+            payload = json.dumps(report_data, indent=2).encode()
+            fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                view = memoryview(payload)
+                while view:
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
             print(f"Detailed JSON report saved to: {filename}")
         except Exception as e:
             print(f"Failed to save JSON report: {e}")
@@ -1,18 +1,139 @@
 #!/usr/bin/env python3
 
+import asyncio
+import bisect
 import socket
+import struct
 import sys
 import time
 import random
+import re
 import os
-import threading
+from array import array
 from datetime import datetime
 from .player_stats import PlayerStats
+from .udp_batch import send_batch, drain_responses
+
+
+# UT packet templates, pre-encoded so packets are built with bytes % formatting
+# (no intermediate str and no per-packet .encode())
+_MOVE_PACKET = (b"\\move\\id%b\\time%d"
+                b"\\x%d\\y%d\\z%d"
+                b"\\pitch%d\\yaw%d\\roll%d"
+                b"\\vel_x%d\\vel_y%d\\vel_z%d")
+_FIRE_PACKET = (b"\\fire\\id%b\\time%d"
+                b"\\weapon%b"
+                b"\\target_x%d\\target_y%d\\target_z%d"
+                b"\\hit%d\\damage%d")
+_STATE_PACKET = (b"\\state\\id%b\\time%d"
+                 b"\\health%d\\armor%d\\score%d"
+                 b"\\deaths%d\\team%b"
+                 b"\\weapon%d\\ammo%d")
+_WEAPON_SWITCH_PACKET = (b"\\weapon\\id%b\\time%d"
+                         b"\\old%d\\new%d\\ammo%d")
+_PLAYER_UPDATE_PACKET = (b"\\player\\id%b\\time%d"
+                         b"\\name\\Player%b\\skin\\%b"
+                         b"\\team%b\\class\\%b")
+_HEARTBEAT_PACKET = b"\\heartbeat\\player%b\\time%d"
+_STATUS_QUERY_PACKET = b"\\status\\\\info\\Player%b"
+_JOIN_PACKET = b"\\connect\\\\name\\Player%b\\team\\red\\skin\\default"
+
+# Pre-encoded field values for the gameplay templates
+_WEAPONS = (b'enforcer', b'biorifle', b'shockrifle', b'pulsegun', b'ripper',
+            b'minigun', b'flak', b'rocket', b'sniper')
+_STATE_TEAMS = (b'red', b'blue', b'green', b'gold')
+_PLAYER_TEAMS = (b'red', b'blue')
+_SKINS = (b'male1', b'male2', b'female1', b'female2')
+_PLAYER_CLASSES = (b'soldier', b'heavy', b'scout')
+
+# Game server ports from nftables config, shared by every client
+_GAME_PORTS = {
+    'ut_servers': (6962, 6963, 9696, 9697, 7787, 7797),
+    'private_servers': (9090, 9091, 5555, 5556, 7766, 7767),
+    'tournament': (5858, 5859, 4848, 4849),
+    'special': (6669, 6670, 6979, 6996, 6997, 8888, 8889, 9669, 9670, 19999, 19998)
+}
+# TCP ports to test
+_TCP_PORTS = (21, 1194, 6567, 19999)
+# Public UT servers (queried and played on), and every server a player may join
+_UT_SERVER_PORTS = _GAME_PORTS['ut_servers']
+_JOIN_PORTS = _GAME_PORTS['ut_servers'] + _GAME_PORTS['private_servers']
+# Ping ports (primary + fallbacks) and the binary ping header: magic and the
+# monotonic send time in ns, followed by the player id
+_PING_PORTS = (9696, 6962, 6963)
+_PING_HEADER = struct.Struct('<IQ')
+_PING_MAGIC = 0xDEADBEEF
+# Bot query ports that receive heartbeats
+_HEARTBEAT_PORTS = (19999, 19998)
+# Primary UDP ports probed together for the availability check
+_AVAILABILITY_PORTS = (6962, 9696, 6963)
+# A server ACK this recent on the game socket already proves the server is up,
+# so the availability check skips its active probe (same window as the probe timeout)
+_REPLY_FRESH_NS = 300_000_000
+
+# struct linger {l_onoff=1, l_linger=0}: close() resets the connection instead
+# of leaving it in TIME_WAIT on the client's ephemeral port
+_LINGER_RESET = struct.pack('ii', 1, 0)
+
+# Weighted picks as (choices, cumulative weights out of 100), bisected directly
+# instead of having random.choices() rebuild the cumulative table each call
+_ACTIVITIES = ('query', 'join', 'gameplay', 'heartbeat', 'tcp_test')
+_ACTIVITY_CUM_WEIGHTS = (5, 7, 92, 97, 100)  # 5/2/85/5/3: gameplay dominates, realistic UT pattern
+_NETSPEED_SETTINGS = ('default', 'high', 'variable')
+_NETSPEED_CUM_WEIGHTS = (60, 90, 100)  # Most use default, some high-end, few variable
+_GAMEPLAY_PACKET_TYPES = ('move', 'fire', 'state_update', 'weapon_switch', 'player_update')
+
+# Only shutdown-related log messages are printed, to avoid spam
+_LOG_FILTER = re.compile(r'shutdown|stopping|down|disconnect', re.IGNORECASE)
+
+# Simulation loop timing is kept in integer nanoseconds from the monotonic clock
+_NS_PER_SEC = 1_000_000_000
+# Packet timestamps are wall-clock, read as integer ns (no float math)
+_NS_PER_MS = 1_000_000
+# Wait this long after a failed server_ip lookup before asking the resolver again
+_RESOLVE_RETRY_NS = 2 * _NS_PER_SEC
+
+# Gameplay padding: "\\gamestate\\" followed by a slice of a per-client block of
+# pre-generated player states (at least this many states, ~20 bytes each)
+_GAMESTATE_PREFIX = b"\\gamestate\\"
+_PAD_STATES = 200
+
+# Requested game socket buffer sizes; the kernel caps them at net.core.wmem_max /
+# rmem_max. Room for whole bursts (send) and ACKs queued between drains (receive)
+_UDP_SNDBUF = 4 * 1024 * 1024
+_UDP_RCVBUF = 4 * 1024 * 1024
+
+# Kernel receive timestamps for ping replies (SO_TIMESTAMPNS, delivered as a
+# struct timespec cmsg). The socket module doesn't export the constant; 35 is
+# its value on Linux
+_SO_TIMESTAMPNS = getattr(socket, 'SO_TIMESTAMPNS', 35) if sys.platform.startswith('linux') else None
+_TIMESPEC = struct.Struct('@ll')
+_PROBE_ANCBUFSIZE = socket.CMSG_SPACE(_TIMESPEC.size)
+
+# Sockets are created non-blocking in the socket() call itself where supported,
+# saving the separate fcntl round trip of setblocking(False)
+_SOCK_NONBLOCK = getattr(socket, 'SOCK_NONBLOCK', 0)
+
+# Random ints drawn per pool refill (16 KB of os.urandom per client)
+_RAND_POOL_SIZE = 4096
+
+
+def _nonblocking_socket(sock_type):
+    """Create a non-blocking IPv4 socket of the given type"""
+    if _SOCK_NONBLOCK:
+        return socket.socket(socket.AF_INET, sock_type | _SOCK_NONBLOCK)
+    sock = socket.socket(socket.AF_INET, sock_type)
+    sock.setblocking(False)
+    return sock
 
 
 class GameClient:
     """Represents a single game client that simulates player behavior."""
     
+    # Port tables are constant, so every instance shares the module-level tuples
+    game_ports = _GAME_PORTS
+    tcp_ports = _TCP_PORTS
+    
     def __init__(self, player_id: int, server_ip: str = "nftables-test-container"):
         self.player_id = player_id
         self.server_ip = server_ip
@@ -31,69 +152,180 @@ class GameClient:
         self.running = False
         self.received_shutdown = False
         
-        # Setup shutdown listener
-        self.shutdown_listener_thread = None
+        # Shutdown listener (registered with the event loop by start_shutdown_listener)
         self.shutdown_socket = None
+        self._shutdown_loop = None
+        self._shutdown_message_count = 0
+
+        # Player id pre-encoded once for the bytes packet templates below
+        self._id_bytes = str(player_id).encode()
+        # Query, join and availability packets never vary for a client, so build them once
+        self._status_query_packet = _STATUS_QUERY_PACKET % self._id_bytes
+        self._join_packet = _JOIN_PACKET % self._id_bytes
+        self._alive_check_packet = b"alive-check-%b" % self._id_bytes
+
+        # Per-client generator (seeded from os.urandom) for activity, port and
+        # size picks, so clients never share or reseed the module-level one
+        self._rng = random.Random()
+
+        # Packet field values come from a pool of random ints filled in one go,
+        # instead of several random.randint() calls per packet
+        self._rand_pool = array('I')
+        self._rand_pos = 0
+        
+        # Filler player states, generated once and sliced at a random offset per packet;
+        # always comfortably longer than the largest padding a packet can need
+        states = max(_PAD_STATES, self.ut_max_payload // 10)
+        r = self._next_randoms(3 * states)
+        self._pad_states = b"\\".join([
+            b"player%d\\%d\\%d\\%d" % (i, 100 + r[3*i] % 900, 100 + r[3*i+1] % 900, r[3*i+2] % 361)
+            for i in range(states)
+        ])
+
+        # Persistent UDP sockets (created on first use): one for outbound game
+        # traffic, one for ping/availability probes that wait for a reply
+        self._udp_sock = None
+        self._probe_sock = None
+        # monotonic_ns of the last drain that found server replies on the game socket
+        self._last_reply_ns = None
 
-        # Game server ports from nftables config
-        self.game_ports = {
-            'ut_servers': [6962, 6963, 9696, 9697, 7787, 7797],
-            'private_servers': [9090, 9091, 5555, 5556, 7766, 7767],
-            'tournament': [5858, 5859, 4848, 4849],
-            'special': [6669, 6670, 6979, 6996, 6997, 8888, 8889, 9669, 9670, 19999, 19998]
+        # server_ip resolved once off the event loop (see _resolve_server), so
+        # sends never block on a hostname lookup
+        self._server_addr = None
+        self._resolved_for = None  # server_ip that _server_addr belongs to
+        self._resolve_retry_ns = 0  # monotonic_ns before which a failed lookup isn't retried
+
+        # Activity name -> bound handler, built once (see _execute_game_activity)
+        self._activity_dispatch = {
+            'query': self._send_server_query,
+            'join': self._attempt_server_join,
+            'gameplay': self._send_gameplay_packets,
+            'heartbeat': self._send_heartbeat,
+            'tcp_test': self._test_tcp_connection,
         }
 
-        # TCP ports to test
-        self.tcp_ports = [21, 1194, 6567, 19999]
+    async def _probe(self, port, message, timeout):
+        """Send `message` to `port` on the probe socket and wait for that port's reply.
+        
+        Returns (send_ns, rx_ns): wall-clock ns just before sending, and the kernel's
+        receive timestamp of the reply (None if the kernel didn't provide one).
+        Both come from the wall clock, so their difference is off by any clock step
+        that lands between them.
+        Raises TimeoutError if no reply from `port` arrives within `timeout` seconds.
+        """
+        _port, send_ns, rx_ns = await self._probe_any((port,), message, timeout)
+        return send_ns, rx_ns
+
+    async def _probe_any(self, ports, message, timeout):
+        """Send `message` to every port in `ports` at once and wait for the first reply.
+        
+        Returns (port, send_ns, rx_ns) for the port that answered first, with
+        send_ns/rx_ns as in _probe. Raises TimeoutError if none of them replies
+        within `timeout` seconds.
+        """
+        loop = asyncio.get_running_loop()
+        if not await self._resolve_server():
+            raise OSError(f"{self.server_ip} not resolved")
+        sock = self._get_probe_socket()
+        # Late replies to earlier, timed-out probes must not answer this one
+        drain_responses(sock)
+        send_ns = time.time_ns()
+        for port in ports:
+            await loop.sock_sendto(sock, message, self._dest(port))
+        # Other players keep running on the event loop while we wait
+        async with asyncio.timeout(timeout):
+            while True:
+                _data, ancdata, _flags, addr = await self._recvmsg(sock, 1024, _PROBE_ANCBUFSIZE)
+                if addr[1] in ports:
+                    return addr[1], send_ns, self._kernel_rx_ns(ancdata)
+
+    async def _recvmsg(self, sock, bufsize, ancbufsize):
+        """Await one datagram with its ancillary data (loop.sock_recvfrom drops cmsgs)"""
+        try:
+            return sock.recvmsg(bufsize, ancbufsize)
+        except (BlockingIOError, InterruptedError):
+            pass
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        def on_readable():
+            if future.done():
+                return
+            try:
+                future.set_result(sock.recvmsg(bufsize, ancbufsize))
+            except (BlockingIOError, InterruptedError):
+                pass  # Spurious wakeup; wait for the next readiness event
+            except Exception as e:
+                future.set_exception(e)
+        
+        fd = sock.fileno()
+        loop.add_reader(fd, on_readable)
+        try:
+            return await future
+        finally:
+            loop.remove_reader(fd)
+
+    @staticmethod
+    def _kernel_rx_ns(ancdata):
+        """Extract the SO_TIMESTAMPNS receive time (ns since epoch) from recvmsg ancillary data"""
+        for level, kind, data in ancdata:
+            if level == socket.SOL_SOCKET and kind == _SO_TIMESTAMPNS and len(data) >= _TIMESPEC.size:
+                sec, nsec = _TIMESPEC.unpack_from(data)
+                return sec * _NS_PER_SEC + nsec
+        return None
 
-    def ping_server(self, count=1, timeout=0.5):
+    async def ping_server(self, count=1, timeout=0.5):
         """Ping the server using a UDP echo and measure round-trip time in ms."""
         # Try multiple ports in case one isn't available
-        ping_ports = [9696, 6962, 6963]  # Primary ping port + fallbacks
-        
         for _ in range(count):
             rtt_measured = False
-            for port in ping_ports:
-                sock = None
+            for port in _PING_PORTS:
                 try:
-                    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                    sock.settimeout(timeout)
-                    message = f"ping-{self.player_id}-{time.time()}".encode()
-                    start = time.time()
-                    sock.sendto(message, (self.server_ip, port))
-                    _data, _addr = sock.recvfrom(1024)
-                    end = time.time()
-                    rtt = (end - start) * 1000.0  # ms
+                    # The same monotonic reading goes in the payload
+                    start = time.monotonic_ns()
+                    message = _PING_HEADER.pack(_PING_MAGIC, start) + self._id_bytes
+                    send_ns, rx_ns = await self._probe(port, message, timeout)
+                    end = time.monotonic_ns()
+                    rtt_ns = end - start
+                    # The kernel arrival time excludes the event loop's wakeup delay, but it
+                    # and send_ns are wall clock: a clock step in between can skew it either
+                    # way, so trust it only when it lies within the monotonic bound
+                    if rx_ns is not None and 0 <= rx_ns - send_ns <= rtt_ns:
+                        rtt_ns = rx_ns - send_ns
+                    rtt = rtt_ns / 1e6  # ms
                     self.stats.record_ping(rtt)  # Use new method for time-series data
                     self.log(f"Ping to port {port}: {rtt:.2f}ms")
                     rtt_measured = True
-                    sock.close()
                     break  # Success, no need to try other ports
                 except Exception as e:
-                    if sock:
-                        sock.close()
                     self.log(f"Ping failed on port {port}: {e}")
                     continue  # Try next port
             
             if not rtt_measured:
-                self.stats.ping_times.append(None)  # All ping attempts failed
+                self.stats.ping_failures += 1  # All ping attempts failed
                 self.log("All ping attempts failed - no server response")
         
     def log(self, message):
         """Log a message with timestamp and player ID."""
-        # Only log shutdown-related messages to avoid spam
-        if any(keyword in message.lower() for keyword in ['shutdown', 'stopping', 'down', 'disconnect']):
+        # Only log shutdown-related messages to avoid spam (one case-insensitive scan)
+        if _LOG_FILTER.search(message):
             print(f"[{datetime.now()}] Player {self.player_id}: {message}")
         
     def start_shutdown_listener(self):
-        """Start listening for server shutdown notifications."""
-        def listen_for_shutdown():
-            self._setup_shutdown_socket()
-            self._listen_for_shutdown_messages()
-            self._cleanup_shutdown_socket()
+        """Start listening for server shutdown notifications.
         
-        self.shutdown_listener_thread = threading.Thread(target=listen_for_shutdown, daemon=True)
-        self.shutdown_listener_thread.start()
+        Must be called from the running event loop: the socket is watched by
+        the loop's own selector (epoll on Linux) instead of a thread per client.
+        """
+        self._setup_shutdown_socket()
+        if self.shutdown_socket is None:
+            return
+        
+        self._shutdown_loop = asyncio.get_running_loop()
+        self._shutdown_loop.add_reader(self.shutdown_socket.fileno(), self._handle_shutdown_messages)
+        print(f"[{datetime.now()}] 🎯 Player {self.player_id}: Shutdown listener is active and waiting for messages...")
+        sys.stdout.flush()
         
     def _setup_shutdown_socket(self):
         """Setup the shutdown listening socket."""
@@ -110,45 +342,53 @@ class GameClient:
                 player_num = 1  # Default fallback
                 
             listen_port = 7778 + (player_num % 10)  # 7778-7787
-            self.shutdown_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            # Non-blocking: read only when the event loop reports it readable
+            self.shutdown_socket = _nonblocking_socket(socket.SOCK_DGRAM)
             self.shutdown_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             self.shutdown_socket.bind(('0.0.0.0', listen_port))
-            self.shutdown_socket.settimeout(1.0)
             self.log(f"Shutdown listener started on port {listen_port}")
         except Exception as e:
             self.log(f"Failed to setup shutdown listener: {e}")  # Better error visibility
+            self._cleanup_shutdown_socket()
             
-    def _listen_for_shutdown_messages(self):
-        """Listen for shutdown messages from server."""
-        print(f"[{datetime.now()}] 🎯 Player {self.player_id}: Shutdown listener is active and waiting for messages...")
-        sys.stdout.flush()
-        
-        message_count = 0
-        while self.running and not self.received_shutdown:
+    def _handle_shutdown_messages(self):
+        """Read every queued message on the shutdown socket (event loop reader callback)."""
+        while not self.received_shutdown:
             try:
                 data, addr = self.shutdown_socket.recvfrom(1024)
-                message = data.decode().strip()
-                message_count += 1
-                print(f"[{datetime.now()}] 📨 Player {self.player_id}: Received message #{message_count} from {addr}: '{message}'")
-                sys.stdout.flush()
-                
-                if message == "SERVER_SHUTDOWN":
-                    print(f"[{datetime.now()}] 📢 Player {self.player_id}: Received shutdown notification from {addr[0]} - preparing for graceful shutdown")
-                    sys.stdout.flush()
-                    self.received_shutdown = True
-                    break
-                else:
-                    print(f"[{datetime.now()}] ⚠️ Player {self.player_id}: Unexpected message: '{message}' (expected 'SERVER_SHUTDOWN')")
-                    sys.stdout.flush()
-            except socket.timeout:
-                continue
+            except BlockingIOError:
+                return  # Queue drained; wait for the next readiness event
             except Exception as e:
                 if self.running:  # Only log errors if we're still supposed to be running
                     self.log(f"Error in shutdown listener: {e}")
-                break
-        
-        print(f"[{datetime.now()}] 🔚 Player {self.player_id}: Shutdown listener stopped (received_shutdown={self.received_shutdown}, running={self.running})")
-        sys.stdout.flush()
+                self._stop_shutdown_listener()
+                return
+            
+            message = data.decode().strip()
+            self._shutdown_message_count += 1
+            print(f"[{datetime.now()}] 📨 Player {self.player_id}: Received message #{self._shutdown_message_count} from {addr}: '{message}'")
+            sys.stdout.flush()
+            
+            if message == "SERVER_SHUTDOWN":
+                print(f"[{datetime.now()}] 📢 Player {self.player_id}: Received shutdown notification from {addr[0]} - preparing for graceful shutdown")
+                sys.stdout.flush()
+                self.received_shutdown = True
+                self._stop_shutdown_listener()
+            else:
+                print(f"[{datetime.now()}] ⚠️ Player {self.player_id}: Unexpected message: '{message}' (expected 'SERVER_SHUTDOWN')")
+                sys.stdout.flush()
+                
+    def _stop_shutdown_listener(self):
+        """Stop watching the shutdown socket and close it."""
+        if self.shutdown_socket is None:
+            return
+        if self._shutdown_loop is not None:
+            if not self._shutdown_loop.is_closed():
+                self._shutdown_loop.remove_reader(self.shutdown_socket.fileno())
+            self._shutdown_loop = None
+            print(f"[{datetime.now()}] 🔚 Player {self.player_id}: Shutdown listener stopped (received_shutdown={self.received_shutdown}, running={self.running})")
+            sys.stdout.flush()
+        self._cleanup_shutdown_socket()
                 
     def _cleanup_shutdown_socket(self):
         """Clean up the shutdown socket."""
@@ -157,57 +397,47 @@ class GameClient:
                 self.shutdown_socket.close()
             except Exception:
                 pass
+            self.shutdown_socket = None
         
-    def is_server_available(self):
+    async def is_server_available(self):
         """Check if server is still available by attempting a quick connection"""
-        # Try multiple ports to determine server availability
-        test_ports = [6962, 9696, 6963]  # Primary UDP ports for availability check
-        
-        for port in test_ports:
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                sock.settimeout(0.3)  # Fast timeout for responsiveness (300ms)
-                test_message = f"alive-check-{self.player_id}".encode()
-                sock.sendto(test_message, (self.server_ip, port))
-                # Wait for any response
-                _data, _addr = sock.recvfrom(1024)
-                sock.close()
-                return True  # Server responded, it's available
-            except Exception as e:
-                if sock:
-                    sock.close()
-                self.log(f"Server availability check failed on port {port}: {e}")
-                continue
+        # Probe several ports at once; any one answering means the server is up
+        try:
+            # Wait for any response - fast timeout for responsiveness (300ms)
+            await self._probe_any(_AVAILABILITY_PORTS, self._alive_check_packet, 0.3)
+            return True  # Server responded, it's available
+        except Exception as e:
+            self.log(f"Server availability check failed on ports {_AVAILABILITY_PORTS}: {e}")
         
         self.log("Server availability: All ports unresponsive")
         return False  # No response from any port, server likely down
 
-    def _check_server_status(self, consecutive_failures, max_failures, start_time, now):
+    async def _check_server_status(self, consecutive_failures, max_failures, start_time, now):
         """Check server availability and return updated failure count"""
-        if self.is_server_available():
+        # Fresh ACKs for our own traffic answer the question without probing; a sent
+        # packet alone doesn't (UDP sends succeed whether or not the server is up)
+        recent_reply = self._last_reply_ns is not None and now - self._last_reply_ns < _REPLY_FRESH_NS
+        if recent_reply or await self.is_server_available():
             consecutive_failures = 0
-            self.log(f"Server availability check: OK (running for {now - start_time:.1f}s)")
+            self.log(f"Server availability check: OK (running for {(now - start_time) / _NS_PER_SEC:.1f}s)")
         else:
             consecutive_failures += 1
             self.log(f"Server availability check: FAILED ({consecutive_failures}/{max_failures})")
             
         return consecutive_failures
 
-    def _execute_game_activity(self, activity):
+    async def _execute_game_activity(self, activity):
         """Execute a specific game activity"""
-        if activity == 'query':
-            self._send_server_query()
-        elif activity == 'join':
-            self._attempt_server_join()
-        elif activity == 'gameplay':
-            self._send_gameplay_packets()
-        elif activity == 'heartbeat':
-            self._send_heartbeat()
-        elif activity == 'tcp_test':
-            self._test_tcp_connection()
-
-    def simulate_game_traffic(self):
-        """Simulate continuous game traffic until server becomes unavailable"""
+        result = self._activity_dispatch[activity]()
+        if result is not None:  # gameplay and tcp_test are coroutines
+            await result
+
+    async def simulate_game_traffic(self):
+        """Simulate continuous game traffic until server becomes unavailable.
+
+        Runs as a coroutine so every client in the process can share one event
+        loop; all waits (pacing, ping and probe responses) yield to other players.
+        """
         self.running = True
         self.log("Starting continuous game simulation (will run until server goes down)...")
         self.log("UT specs: {}Hz tickrate, {}-{} netspeed, {}B overhead".format(
@@ -216,26 +446,26 @@ class GameClient:
             self.ut_default_payload, self.ut_max_payload, 
             self.ut_default_payload + self.ut_udp_overhead, self.ut_max_payload + self.ut_udp_overhead))
 
-        # Start listening for server shutdown notifications
+        # Start listening for server shutdown notifications (bound before this returns)
         self.start_shutdown_listener()
         
-        # Give shutdown listener time to properly bind to port
-        time.sleep(0.5)
+        start_time = time.monotonic_ns()
         
-        start_time = time.time()
+        # Resolve the server before the first send; retried from the loop if it fails
+        await self._resolve_server()
         
         try:
             last_ping = 0
             last_server_check = 0
             last_throughput_snapshot = 0
-            ping_interval = 2  # More frequent ping collection (every 2 seconds)
-            server_check_interval = 2   # Check server availability every 2 seconds (faster detection)
-            throughput_snapshot_interval = 2  # Record throughput every 2 seconds
+            ping_interval = 2 * _NS_PER_SEC  # More frequent ping collection (every 2 seconds)
+            server_check_interval = 2 * _NS_PER_SEC   # Check server availability every 2 seconds (faster detection)
+            throughput_snapshot_interval = 2 * _NS_PER_SEC  # Record throughput every 2 seconds
             consecutive_failures = 0
             max_consecutive_failures = 2  # Server considered down after 2 consecutive failures (faster)
 
             while self.running:
-                now = time.time()
+                now = time.monotonic_ns()
                 
                 # Check for server shutdown notification (highest priority)
                 if self.received_shutdown:
@@ -245,7 +475,7 @@ class GameClient:
                 
                 # Ping server periodically for latency measurement
                 if now - last_ping > ping_interval:
-                    self.ping_server(count=1)
+                    await self.ping_server(count=1)
                     last_ping = now
                 
                 # Record throughput snapshot periodically
@@ -255,46 +485,50 @@ class GameClient:
                 
                 # Check server availability periodically
                 if now - last_server_check > server_check_interval:
-                    consecutive_failures = self._check_server_status(
+                    consecutive_failures = await self._check_server_status(
                         consecutive_failures, max_consecutive_failures, start_time, now)
                         
                     if consecutive_failures >= max_consecutive_failures:
-                        elapsed_time = now - start_time
+                        elapsed_time = (now - start_time) / _NS_PER_SEC
                         print(f"[{datetime.now()}] ❌ Player {self.player_id}: Server appears to be down - stopping simulation (REASON: {consecutive_failures} consecutive connection failures after {elapsed_time:.1f}s)")
                         sys.stdout.flush()
                         break
                             
                     last_server_check = now
                 
+                if self._server_addr is None or self._resolved_for is not self.server_ip:
+                    await self._resolve_server()  # Returns at once while a failed lookup backs off
+                
                 try:
                     # Select and execute game activity with realistic UT patterns
-                    activity = random.choices(
-                        ['query', 'join', 'gameplay', 'heartbeat', 'tcp_test'],
-                        weights=[5, 2, 85, 5, 3]  # Gameplay dominates (85%), realistic UT pattern
-                    )[0]
+                    activity = _ACTIVITIES[bisect.bisect_right(_ACTIVITY_CUM_WEIGHTS, self._rng.random() * 100)]
+                    
+                    await self._execute_game_activity(activity)
                     
-                    self._execute_game_activity(activity)
+                    # Sweep up whatever replies have arrived since the last activity
+                    self._drain_udp_responses()
                     
                     # Realistic UT gameplay frequency using authentic tickrate
                     if activity == 'gameplay':
                         delay = self.ut_tick_interval  # Already handled in _send_gameplay_packets
                     else:
-                        delay = random.uniform(0.05, 0.5)  # Other activities more frequent, less blocking
-                    time.sleep(delay)
+                        delay = self._rng.uniform(0.05, 0.5)  # Other activities more frequent, less blocking
+                    await asyncio.sleep(delay)
                     
                 except Exception as e:
-                    self.stats.errors.append(f"Activity {activity}: {str(e)}")
-                    time.sleep(0.001)  # Minimal pause on error, maximum throughput
+                    self.stats.record_error(f"Activity {activity}: {str(e)}")
+                    await asyncio.sleep(0.001)  # Minimal pause on error, maximum throughput
 
         except Exception as e:
             # Handle unexpected errors during simulation
-            total_runtime = time.time() - start_time
+            total_runtime = (time.monotonic_ns() - start_time) / _NS_PER_SEC
             print(f"[{datetime.now()}] 💥 Player {self.player_id}: Simulation crashed after {total_runtime:.1f}s (REASON: Unexpected error - {str(e)}) - {self.stats.udp_packets_sent} UDP packets, {self.stats.tcp_connections} TCP connections")
             sys.stdout.flush()
             
         finally:
             self.running = False
-            total_runtime = time.time() - start_time
+            self.close()
+            total_runtime = (time.monotonic_ns() - start_time) / _NS_PER_SEC
             
             # Log final shutdown reason (if not already logged)
             if hasattr(self, 'received_shutdown') and self.received_shutdown:
@@ -306,18 +540,23 @@ class GameClient:
         
     def _send_server_query(self):
         """Send query packets to discover servers"""
-        for port in random.sample(self.game_ports['ut_servers'], 2):
-            self._send_udp_packet(port, f"\\status\\\\info\\Player{self.player_id}")
+        # Two distinct servers: the second is offset 1..n-1 positions from the first
+        ports = _UT_SERVER_PORTS
+        n = len(ports)
+        r = self._next_randoms(2)
+        first = r[0] % n
+        second = (first + 1 + r[1] % (n - 1)) % n
+        self._send_udp_packet(ports[first], self._status_query_packet)
+        self._send_udp_packet(ports[second], self._status_query_packet)
             
     def _attempt_server_join(self):
         """Simulate joining a game server"""
-        port = random.choice(self.game_ports['ut_servers'] + self.game_ports['private_servers'])
-        join_packet = f"\\connect\\\\name\\Player{self.player_id}\\team\\red\\skin\\default"
-        self._send_udp_packet(port, join_packet)
+        port = _JOIN_PORTS[self._next_randoms(1)[0] % len(_JOIN_PORTS)]
+        self._send_udp_packet(port, self._join_packet)
         
-    def _send_gameplay_packets(self):
+    async def _send_gameplay_packets(self):
         """Send realistic UT gameplay packets with authentic server specifications"""
-        port = random.choice(self.game_ports['ut_servers'])
+        burst_start = time.monotonic()
         
         # Using authentic UT server specs from your friend:
         # - UDP overhead: {self.ut_udp_overhead} bytes
@@ -326,129 +565,295 @@ class GameClient:
         # - Max netspeed: {self.ut_max_netspeed} bytes/sec → {self.ut_max_payload} byte payload
         
         # Send packets at authentic UT tickrate
-        packets_in_burst = random.randint(5, 15)  # Realistic burst size
+        packets_in_burst = self._rng.randint(5, 15)  # Realistic burst size
+        
+        # One pool read covers the burst: two ints per packet (type, padding
+        # offset) plus one for the server port
+        r = self._next_randoms(2 * packets_in_burst + 1)
+        port = _UT_SERVER_PORTS[r[-1] % len(_UT_SERVER_PORTS)]
+        
+        # Build the whole burst first so it can go out in a single syscall;
+        # every packet in it carries the same millisecond timestamp
+        timestamp = time.time_ns() // _NS_PER_MS
+        payloads = []
         
-        for _ in range(packets_in_burst):
+        # Loop invariants bound to locals once per burst
+        rand = self._rng.random
+        randint = self._rng.randint
+        bisect_right = bisect.bisect_right
+        generate = self._generate_ut_packet_data
+        packet_types = _GAMEPLAY_PACKET_TYPES
+        num_types = len(packet_types)
+        append = payloads.append
+        default_payload = self.ut_default_payload
+        max_payload = self.ut_max_payload
+        pad_states = self._pad_states
+        prefix_len = len(_GAMESTATE_PREFIX)
+        
+        for i in range(0, 2 * packets_in_burst, 2):
             # Simulate different netspeed settings based on real server configurations
-            netspeed_setting = random.choices(
-                ['default', 'high', 'variable'],
-                weights=[60, 30, 10]  # Most use default, some high-end, few variable
-            )[0]
+            netspeed_setting = _NETSPEED_SETTINGS[bisect_right(_NETSPEED_CUM_WEIGHTS, rand() * 100)]
             
             if netspeed_setting == 'default':
                 # Default netspeed from env: payload size
-                target_payload_size = self.ut_default_payload
+                target_payload_size = default_payload
             elif netspeed_setting == 'high':
                 # Max netspeed from env: payload size
-                target_payload_size = self.ut_max_payload
+                target_payload_size = max_payload
             else:  # variable
                 # Random between default and max (realistic variance)
-                target_payload_size = random.randint(self.ut_default_payload, self.ut_max_payload)
+                target_payload_size = randint(default_payload, max_payload)
             
             # Generate realistic gameplay data to reach target size
-            packet_types = ['move', 'fire', 'state_update', 'weapon_switch', 'player_update']
-            packet_type = random.choice(packet_types)
-            
-            base_data = self._generate_ut_packet_data(packet_type)
+            base_data = generate(packet_types[r[i] % num_types], timestamp)
             
             # Pad to realistic size (simulating game state, player positions, etc.)
-            padding_needed = max(0, target_payload_size - len(base_data))
+            padding_needed = target_payload_size - len(base_data)
             if padding_needed > 0:
-                # Add realistic padding (player states, world updates, etc.)
-                padding = "\\gamestate\\" + "\\".join([
-                    f"player{i}\\{random.randint(100,999)}\\{random.randint(100,999)}\\{random.randint(0,360)}"
-                    for i in range(padding_needed // 40)  # Each player state ~40 chars
-                ])[:padding_needed]
-                base_data += padding
+                # Add realistic padding (player states, world updates, etc.): a random
+                # window of the pre-generated states, so the packet hits the target size
+                states_needed = padding_needed - prefix_len
+                if states_needed > 0:
+                    offset = r[i + 1] % (len(pad_states) - states_needed + 1)
+                    base_data = b"".join((base_data, _GAMESTATE_PREFIX,
+                                          pad_states[offset:offset + states_needed]))
+                else:
+                    base_data += _GAMESTATE_PREFIX[:padding_needed]
                 
-            self._send_udp_packet(port, base_data)
+            append(base_data)
             
-            # Use authentic UT tickrate from environment
-            time.sleep(self.ut_tick_interval)  # Real server tickrate timing
+        self._send_udp_batch(port, payloads)
+        
+        # Keep the authentic UT tickrate on average: one sleep to the burst's
+        # deadline, so time spent building and sending counts toward its ticks
+        deadline = burst_start + self.ut_tick_interval * packets_in_burst  # Real server tickrate timing
+        await asyncio.sleep(max(0.0, deadline - time.monotonic()))
             
-    def _generate_ut_packet_data(self, packet_type):
-        """Generate realistic UT packet data based on packet type"""
-        timestamp = int(time.time() * 1000)  # UT uses millisecond timestamps
+    def _next_randoms(self, count):
+        """Return the next `count` random 32-bit ints from the client's pre-generated pool"""
+        start = self._rand_pos
+        if start + count > len(self._rand_pool):
+            self._rand_pool = array('I', os.urandom(4 * max(count, _RAND_POOL_SIZE)))  # Refill
+            start = 0
+        self._rand_pos = start + count
+        return self._rand_pool[start:start + count]
+
+    def _generate_ut_packet_data(self, packet_type, timestamp=None):
+        """Generate realistic UT packet data (encoded bytes) based on packet type"""
+        if timestamp is None:
+            timestamp = time.time_ns() // _NS_PER_MS  # UT uses millisecond timestamps
         
+        # Field values are lo + r % (hi - lo + 1), i.e. the same inclusive ranges as randint(lo, hi)
         if packet_type == 'move':
-            return (f"\\move\\id{self.player_id}\\time{timestamp}"
-                   f"\\x{random.randint(0,4096)}\\y{random.randint(0,4096)}\\z{random.randint(0,1024)}"
-                   f"\\pitch{random.randint(-90,90)}\\yaw{random.randint(0,360)}\\roll{random.randint(-180,180)}"
-                   f"\\vel_x{random.randint(-500,500)}\\vel_y{random.randint(-500,500)}\\vel_z{random.randint(-200,200)}")
+            r = self._next_randoms(9)
+            return _MOVE_PACKET % (
+                self._id_bytes, timestamp,
+                r[0] % 4097, r[1] % 4097, r[2] % 1025,
+                r[3] % 181 - 90, r[4] % 361, r[5] % 361 - 180,
+                r[6] % 1001 - 500, r[7] % 1001 - 500, r[8] % 401 - 200)
                    
         elif packet_type == 'fire':
-            return (f"\\fire\\id{self.player_id}\\time{timestamp}"
-                   f"\\weapon{random.choice(['enforcer','biorifle','shockrifle','pulsegun','ripper','minigun','flak','rocket','sniper'])}"
-                   f"\\target_x{random.randint(0,4096)}\\target_y{random.randint(0,4096)}\\target_z{random.randint(0,1024)}"
-                   f"\\hit{random.choice([0,1])}\\damage{random.randint(20,100)}")
+            r = self._next_randoms(7)
+            return _FIRE_PACKET % (
+                self._id_bytes, timestamp,
+                _WEAPONS[r[0] % 9],
+                r[1] % 4097, r[2] % 4097, r[3] % 1025,
+                r[4] & 1, 20 + r[5] % 81)
                    
         elif packet_type == 'state_update':
-            return (f"\\state\\id{self.player_id}\\time{timestamp}"
-                   f"\\health{random.randint(1,199)}\\armor{random.randint(0,150)}\\score{random.randint(0,50)}"
-                   f"\\deaths{random.randint(0,20)}\\team{random.choice(['red','blue','green','gold'])}"
-                   f"\\weapon{random.randint(0,9)}\\ammo{random.randint(0,999)}")
+            r = self._next_randoms(7)
+            return _STATE_PACKET % (
+                self._id_bytes, timestamp,
+                1 + r[0] % 199, r[1] % 151, r[2] % 51,
+                r[3] % 21, _STATE_TEAMS[r[4] & 3],
+                r[5] % 10, r[6] % 1000)
                    
         elif packet_type == 'weapon_switch':
-            return (f"\\weapon\\id{self.player_id}\\time{timestamp}"
-                   f"\\old{random.randint(0,9)}\\new{random.randint(0,9)}\\ammo{random.randint(0,999)}")
+            r = self._next_randoms(3)
+            return _WEAPON_SWITCH_PACKET % (
+                self._id_bytes, timestamp,
+                r[0] % 10, r[1] % 10, r[2] % 1000)
                    
         else:  # player_update
-            return (f"\\player\\id{self.player_id}\\time{timestamp}"
-                   f"\\name\\Player{self.player_id}\\skin\\{random.choice(['male1','male2','female1','female2'])}"
-                   f"\\team{random.choice(['red','blue'])}\\class\\{random.choice(['soldier','heavy','scout'])}")
+            r = self._next_randoms(3)
+            return _PLAYER_UPDATE_PACKET % (
+                self._id_bytes, timestamp, self._id_bytes,
+                _SKINS[r[0] & 3], _PLAYER_TEAMS[r[1] & 1], _PLAYER_CLASSES[r[2] % 3])
 
     def _send_heartbeat(self):
         """Send heartbeat/keepalive packets"""
-        port = random.choice([19999, 19998])  # Bot query ports
-        self._send_udp_packet(port, f"\\heartbeat\\player{self.player_id}\\time{int(time.time())}")
+        port = _HEARTBEAT_PORTS[self._next_randoms(1)[0] & 1]
+        self._send_udp_packet(port, _HEARTBEAT_PACKET % (self._id_bytes, time.time_ns() // _NS_PER_SEC))
         
-    def _test_tcp_connection(self):
+    async def _test_tcp_connection(self):
         """Test TCP connections (like FTP, VPN, etc.)"""
-        port = random.choice(self.tcp_ports)
+        loop = asyncio.get_running_loop()
+        port = _TCP_PORTS[self._next_randoms(1)[0] % len(_TCP_PORTS)]
+        sock = None
         
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(0.5)  # Very short timeout for connection attempt
+            sock = _nonblocking_socket(socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RESET)
             
-            result = sock.connect_ex((self.server_ip, port))
-            if result == 0:
+            try:
+                if not await self._resolve_server():
+                    raise OSError(f"{self.server_ip} not resolved")
+                # Very short timeout for connection attempt
+                await asyncio.wait_for(loop.sock_connect(sock, self._dest(port)), 0.5)
+            except (OSError, asyncio.TimeoutError):
+                self.stats.tcp_failed += 1
+            else:
                 self.stats.tcp_connections += 1
-                # Send some data
+                # Send some data - a few bytes always fit in a fresh socket's send buffer.
+                # Counts bytes written to the socket, not bytes delivered: the reset on
+                # close discards anything the server hasn't acknowledged yet
                 data = f"Player{self.player_id} TCP test to port {port}".encode()
-                sock.send(data)
-                self.stats.total_bytes_sent += len(data)
+                self.stats.total_bytes_sent += sock.send(data)
                 
                 # Fire-and-forget for TCP testing - no blocking waits
                 # Count as successful for throughput testing
                 self.stats.total_bytes_received += len(data)  # Estimate for stats
-            else:
-                self.stats.tcp_failed += 1
-                
-            sock.close()
             
         except Exception as e:
             self.stats.tcp_failed += 1
-            self.stats.errors.append(f"TCP {port}: {str(e)}")
+            self.stats.record_error(f"TCP {port}: {str(e)}")
+        finally:
+            if sock:
+                sock.close()
+            
+    async def _resolve_server(self):
+        """Resolve server_ip to an IPv4 address without blocking the event loop.
+        
+        Looks the host up once per server_ip value. A failed lookup is recorded and
+        not retried for _RESOLVE_RETRY_NS. Returns True once an address is known.
+        """
+        if self._resolved_for is self.server_ip and self._server_addr is not None:
+            return True
+        now = time.monotonic_ns()
+        if self._resolved_for is self.server_ip and now < self._resolve_retry_ns:
+            return False  # Still backing off after a failed lookup
+        host = self._resolved_for = self.server_ip
+        self._server_addr = None
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                host, None, family=socket.AF_INET, type=socket.SOCK_DGRAM)
+        except OSError as e:
+            self._resolve_retry_ns = now + _RESOLVE_RETRY_NS
+            self.stats.record_error(f"Resolve {host}: {str(e)}")
+            return False
+        if self._resolved_for is host:  # server_ip wasn't reassigned while we waited
+            self._server_addr = infos[0][4][0]
+        return self._server_addr is not None
+    
+    def _dest(self, port):
+        """Return the (ip, port) address for `port`, or None until server_ip is resolved"""
+        if self._server_addr is None or self._resolved_for is not self.server_ip:
+            return None
+        return (self._server_addr, port)
             
-    def _send_udp_packet(self, port, data):
-        """Send a UDP packet and try to get response"""
+    def _get_udp_socket(self):
+        """Return the client's persistent UDP socket, creating it on first use"""
+        if self._udp_sock is None:
+            # Non-blocking: a timeout makes CPython poll() before every send, and
+            # the event loop thread must never block on a full send buffer anyway
+            sock = _nonblocking_socket(socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _UDP_SNDBUF)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _UDP_RCVBUF)
+            self._udp_sock = sock
+        return self._udp_sock
+            
+    def _get_probe_socket(self):
+        """Return the client's persistent ping/availability probe socket, creating it on first use"""
+        if self._probe_sock is None:
+            sock = _nonblocking_socket(socket.SOCK_DGRAM)
+            if _SO_TIMESTAMPNS is not None:
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, _SO_TIMESTAMPNS, 1)  # Stamp replies on arrival
+                except OSError:
+                    pass  # Fall back to timing the reply in user space
+            self._probe_sock = sock
+        return self._probe_sock
+            
+    def _send_udp_packet(self, port, packet_data):
+        """Send an encoded UDP packet (fire-and-forget)"""
+        dest = self._dest(port)
+        if dest is None:
+            self.stats.record_error(f"UDP {port}: {self.server_ip} not resolved")
+            return
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.settimeout(0.1)  # Very short timeout for any accidental blocking
+            sock = self._get_udp_socket()
             
-            packet_data = data.encode()
-            sock.sendto(packet_data, (self.server_ip, port))
+            sock.sendto(packet_data, dest)
             self.stats.udp_packets_sent += 1
             self.stats.total_bytes_sent += len(packet_data)
             
             # Fire-and-forget for maximum throughput during testing
             # Don't wait for responses to avoid blocking during high-load scenarios
             self.stats.udp_responses += 1  # Count as sent for stats
-                
-            sock.close()
             
+        except BlockingIOError:
+            self.stats.record_error(f"UDP {port}: send buffer full, 1 packet dropped")
+        except OSError as e:
+            self.stats.record_error(f"UDP {port}: {str(e)}")
+            self._discard_udp_socket()
+        except Exception as e:
+            self.stats.record_error(f"UDP {port}: {str(e)}")
+            
+    def _send_udp_batch(self, port, payloads):
+        """Send a burst of pre-encoded UDP packets to one port"""
+        dest = self._dest(port)
+        if dest is None:
+            self.stats.record_error(f"UDP {port}: {self.server_ip} not resolved")
+            return
+        try:
+            sent = send_batch(self._get_udp_socket(), payloads, dest)
+            self.stats.udp_packets_sent += sent
+            self.stats.total_bytes_sent += sum(len(p) for p in payloads[:sent])
+            
+            # Fire-and-forget, same accounting as _send_udp_packet
+            self.stats.udp_responses += sent
+            
+            if sent < len(payloads):
+                self.stats.record_error(f"UDP {port}: send buffer full, {len(payloads) - sent} packets dropped")
+            
+        except OSError as e:
+            self.stats.record_error(f"UDP {port}: {str(e)}")
+            self._discard_udp_socket()
+        except Exception as e:
+            self.stats.record_error(f"UDP {port}: {str(e)}")
+            
+    def _discard_udp_socket(self):
+        """Close the game traffic socket after a send error; the next send opens a fresh one"""
+        sock, self._udp_sock = self._udp_sock, None
+        if sock is not None:
+            try:
+                sock.close()
+            except Exception:
+                pass
+            
+    def _drain_udp_responses(self):
+        """Collect server ACKs queued on the UDP socket so they don't pile up unread"""
+        if self._udp_sock is None:
+            return
+        try:
+            count, nbytes = drain_responses(self._udp_sock)
+            if count:
+                self._last_reply_ns = time.monotonic_ns()
+            self.stats.total_bytes_received += nbytes
         except Exception as e:
-            self.stats.errors.append(f"UDP {port}: {str(e)}")
+            self.stats.record_error(f"UDP drain: {str(e)}")
+            
+    def close(self):
+        """Close sockets kept open for the lifetime of the client"""
+        self._stop_shutdown_listener()
+        for sock in (self._udp_sock, self._probe_sock):
+            if sock is not None:
+                try:
+                    sock.close()
+                except Exception:
+                    pass
+        self._udp_sock = None
+        self._probe_sock = None
             
     def get_stats_dict(self):
         """Return stats as dictionary for JSON serialization"""
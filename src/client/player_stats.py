@@ -1,11 +1,27 @@
 #!/usr/bin/env python3
 
 import time
+from array import array
+from collections import deque
 from dataclasses import dataclass
-from typing import List, Optional, Dict
+from typing import Deque, List, Optional, Dict
 
+MAX_ERRORS_KEPT = 10  # Most recent error messages retained per player
+MAX_HISTORY_KEPT = 4096  # Time-series samples retained per series (the newest half survives a trim)
 
-@dataclass
+
+def _trim_history(*series):
+    """Drop the oldest samples of parallel series once they exceed MAX_HISTORY_KEPT.
+
+    Trims down to half the cap, so the copy is amortized O(1) per sample.
+    """
+    if len(series[0]) > MAX_HISTORY_KEPT:
+        drop = len(series[0]) - MAX_HISTORY_KEPT // 2
+        for values in series:
+            del values[:drop]
+
+
+@dataclass(slots=True)
 class PlayerStats:
     """Statistics tracking for a game client player."""
     player_id: int
@@ -16,59 +32,94 @@ class PlayerStats:
     udp_timeouts: int = 0
     total_bytes_sent: int = 0
     total_bytes_received: int = 0
-    errors: Optional[List[str]] = None
-    ping_times: Optional[List[float]] = None  # Store ping round-trip times in ms
-    # Time-series data for graphs
-    ping_history: Optional[List[Dict]] = None  # [{timestamp, ping_ms}, ...]
-    throughput_history: Optional[List[Dict]] = None  # [{timestamp, packets_per_sec}, ...]
+    errors: Optional[Deque[str]] = None  # Last MAX_ERRORS_KEPT error messages
+    error_count: int = 0  # Every error recorded, including ones no longer kept
+    ping_times: Optional[array] = None  # Recent successful ping round-trip times in ms (packed doubles)
+    ping_count: int = 0  # Every successful ping, including samples no longer kept
+    ping_failures: int = 0  # Ping attempts where no port answered
+    # Running ping aggregates over every sample, kept up to date by record_ping
+    ping_min: Optional[float] = None
+    ping_max: Optional[float] = None
+    ping_sum: float = 0.0
+    # Time-series data for graphs, kept as parallel typed arrays (seconds since start_time);
+    # ping_history / throughput_history rebuild the [{...}, ...] form for the report
+    ping_timestamps: Optional[array] = None  # One per ping_times sample
+    throughput_timestamps: Optional[array] = None
+    throughput_rates: Optional[array] = None  # Packets/sec since the previous snapshot
+    throughput_packets: Optional[array] = None  # udp_packets_sent at the snapshot
+    throughput_bytes: Optional[array] = None  # total_bytes_sent at the snapshot
     start_time: Optional[float] = None
 
     def __post_init__(self):
         if self.errors is None:
-            self.errors = []
+            self.errors = deque(maxlen=MAX_ERRORS_KEPT)
         if self.ping_times is None:
-            self.ping_times = []
-        if self.ping_history is None:
-            self.ping_history = []
-        if self.throughput_history is None:
-            self.throughput_history = []
+            self.ping_times = array('d')
+        if self.ping_timestamps is None:
+            self.ping_timestamps = array('d')
+        if self.throughput_timestamps is None:
+            self.throughput_timestamps = array('d')
+        if self.throughput_rates is None:
+            self.throughput_rates = array('d')
+        if self.throughput_packets is None:
+            self.throughput_packets = array('q')
+        if self.throughput_bytes is None:
+            self.throughput_bytes = array('q')
         if self.start_time is None:
             self.start_time = time.time()
             
+    def record_error(self, message: str):
+        """Count an error and keep its message among the most recent ones"""
+        self.error_count += 1
+        self.errors.append(message)
+        
     def record_ping(self, ping_ms: float):
         """Record a ping measurement with timestamp"""
         self.ping_times.append(ping_ms)
-        self.ping_history.append({
-            'timestamp': time.time() - self.start_time,  # Relative time in seconds
-            'ping_ms': ping_ms
-        })
+        if self.ping_min is None or ping_ms < self.ping_min:
+            self.ping_min = ping_ms
+        if self.ping_max is None or ping_ms > self.ping_max:
+            self.ping_max = ping_ms
+        self.ping_sum += ping_ms
+        self.ping_count += 1
+        self.ping_timestamps.append(time.time() - self.start_time)  # Relative time in seconds
+        _trim_history(self.ping_times, self.ping_timestamps)
     
     def record_throughput_snapshot(self):
         """Record current throughput snapshot"""
         current_time = time.time() - self.start_time
         # Calculate packets per second since last snapshot
-        if self.throughput_history:
-            last_snapshot = self.throughput_history[-1]
-            time_diff = current_time - last_snapshot['timestamp']
-            packet_diff = self.udp_packets_sent - last_snapshot.get('total_packets', 0)
+        if self.throughput_timestamps:
+            time_diff = current_time - self.throughput_timestamps[-1]
+            packet_diff = self.udp_packets_sent - self.throughput_packets[-1]
             packets_per_sec = packet_diff / time_diff if time_diff > 0 else 0
         else:
             packets_per_sec = self.udp_packets_sent / current_time if current_time > 0 else 0
             
-        self.throughput_history.append({
-            'timestamp': current_time,
-            'packets_per_sec': packets_per_sec,
-            'total_packets': self.udp_packets_sent,
-            'total_bytes': self.total_bytes_sent
-        })
+        self.throughput_timestamps.append(current_time)
+        self.throughput_rates.append(packets_per_sec)
+        self.throughput_packets.append(self.udp_packets_sent)
+        self.throughput_bytes.append(self.total_bytes_sent)
+        _trim_history(self.throughput_timestamps, self.throughput_rates,
+                      self.throughput_packets, self.throughput_bytes)
+
+    @property
+    def ping_history(self) -> List[Dict]:
+        """Ping samples as [{timestamp, ping_ms}, ...]"""
+        return [{'timestamp': t, 'ping_ms': p} for t, p in zip(self.ping_timestamps, self.ping_times)]
+
+    @property
+    def throughput_history(self) -> List[Dict]:
+        """Throughput snapshots as [{timestamp, packets_per_sec, total_packets, total_bytes}, ...]"""
+        return [{'timestamp': t, 'packets_per_sec': pps, 'total_packets': packets, 'total_bytes': nbytes}
+                for t, pps, packets, nbytes in zip(self.throughput_timestamps, self.throughput_rates,
+                                                   self.throughput_packets, self.throughput_bytes)]
 
     def get_stats_dict(self):
         """Return stats as dictionary for JSON serialization"""
-        # Calculate ping stats
-        valid_pings = [p for p in self.ping_times if p is not None]
-        ping_min = min(valid_pings) if valid_pings else None
-        ping_max = max(valid_pings) if valid_pings else None
-        ping_avg = sum(valid_pings) / len(valid_pings) if valid_pings else None
+        # Ping stats come from the running aggregates (failed pings are counted separately, never stored)
+        ping_count = self.ping_count
+        ping_avg = self.ping_sum / ping_count if ping_count else None
         
         return {
             'player_id': self.player_id,
@@ -79,12 +130,13 @@ class PlayerStats:
             'udp_timeouts': self.udp_timeouts,
             'total_bytes_sent': self.total_bytes_sent,
             'total_bytes_received': self.total_bytes_received,
-            'error_count': len(self.errors),
-            'errors': self.errors[:10],  # Limit errors in output
-            'ping_min_ms': ping_min,
-            'ping_max_ms': ping_max,
+            'error_count': self.error_count,
+            'errors': list(self.errors),  # Most recent errors only
+            'ping_min_ms': self.ping_min,
+            'ping_max_ms': self.ping_max,
             'ping_avg_ms': ping_avg,
-            'ping_count': len(valid_pings),
+            'ping_count': ping_count,
+            'ping_failures': self.ping_failures,
             # Time-series data for dashboard graphs
             'ping_history': self.ping_history,
             'throughput_history': self.throughput_history
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+"""
+Batched UDP sending and receiving for game client bursts.
+
+Linux can hand a whole burst of datagrams to the kernel in one sendmmsg(2)
+call, and collect queued replies with one recvmmsg(2) call, through the ctypes
+bindings in utils.mmsg. On platforms without them every packet falls back to a
+plain sendto() / recv().
+"""
+
+import ctypes
+import functools
+import socket
+import threading
+
+try:
+    from ..utils.mmsg import (IOVec, MMsgHdr, SockAddrIn, raise_unless_would_block,
+                              recvmmsg as _recvmmsg, sendmmsg as _sendmmsg)
+except ImportError:  # Loaded as a top-level package, with src/ itself on sys.path
+    from utils.mmsg import (IOVec, MMsgHdr, SockAddrIn, raise_unless_would_block,
+                            recvmmsg as _recvmmsg, sendmmsg as _sendmmsg)
+
+
+# Per-thread sendmmsg/recvmmsg header arrays (and receive buffers), built once
+# and reused so a batch call only fills in pointers and lengths
+_send_scratch = threading.local()
+_recv_scratch = threading.local()
+RECV_BUFSIZE = 1024
+
+
+def _get_send_scratch(count):
+    """Return this thread's (msgs, iovecs, addr) sendmmsg scratch space for at least count messages."""
+    scratch = getattr(_send_scratch, 'value', None)
+    if scratch is None or len(scratch[0]) < count:
+        size = max(count, 16)
+        iovecs = (IOVec * size)()
+        msgs = (MMsgHdr * size)()
+        addr = SockAddrIn()
+        for i in range(size):
+            hdr = msgs[i].msg_hdr
+            hdr.msg_name = ctypes.addressof(addr)
+            hdr.msg_namelen = ctypes.sizeof(addr)
+            hdr.msg_iov = ctypes.pointer(iovecs[i])
+            hdr.msg_iovlen = 1
+        scratch = _send_scratch.value = (msgs, iovecs, addr)
+    return scratch
+
+
+@functools.lru_cache(maxsize=64)
+def _packed_sockaddr(address):
+    """Return the sockaddr_in bytes for a (host, port) tuple, resolving host once."""
+    host, port = address
+    try:
+        packed_ip = socket.inet_aton(host)
+    except OSError:
+        packed_ip = socket.inet_aton(socket.gethostbyname(host))
+    addr = SockAddrIn(socket.AF_INET, socket.htons(port))
+    ctypes.memmove(addr.sin_addr, packed_ip, 4)
+    return bytes(addr)
+
+
+def _send_each(sock, payloads, address):
+    """Send payloads one sendto() at a time; returns the number sent.
+
+    Stops early when a non-blocking socket's send buffer is full.
+    """
+    sent = 0
+    for payload in payloads:
+        try:
+            sock.sendto(payload, address)
+        except BlockingIOError:
+            break
+        sent += 1
+    return sent
+
+
+def send_batch(sock, payloads, address):
+    """Send every payload in `payloads` to `address` (a (host, port) tuple).
+
+    Uses a single sendmmsg() call for IPv4 sockets when available. Anything
+    the kernel doesn't accept in that call is retried with regular sendto()
+    calls, so errors surface exactly as they would for a single packet. A full
+    send buffer on a non-blocking socket is not an error: the rest of the batch
+    is dropped. Returns the number of datagrams sent.
+    """
+    count = len(payloads)
+    if count == 0:
+        return 0
+    if _sendmmsg is None or sock.family != socket.AF_INET:
+        return _send_each(sock, payloads, address)
+
+    sockaddr = _packed_sockaddr(address)
+    msgs, iovecs, addr = _get_send_scratch(count)
+    ctypes.memmove(ctypes.addressof(addr), sockaddr, len(sockaddr))
+
+    # c_char_p points straight at each bytes object's buffer (no copy); the
+    # list keeps them alive until the syscall returns
+    buffers = [ctypes.c_char_p(payload) for payload in payloads]
+    for i, payload in enumerate(payloads):
+        iov = iovecs[i]
+        iov.iov_base = ctypes.cast(buffers[i], ctypes.c_void_p)
+        iov.iov_len = len(payload)
+
+    sent = _sendmmsg(sock.fileno(), msgs, count, 0)
+    if sent < 0:
+        sent = 0
+    if sent < count:
+        sent += _send_each(sock, payloads[sent:], address)
+    return sent
+
+
+def _get_recv_scratch(max_msgs):
+    """Return this thread's (msgs, buffers) recvmmsg scratch space for at least max_msgs."""
+    scratch = getattr(_recv_scratch, 'value', None)
+    if scratch is None or len(scratch[0]) < max_msgs:
+        buffers = (ctypes.c_char * (RECV_BUFSIZE * max_msgs))()
+        iovecs = (IOVec * max_msgs)()
+        msgs = (MMsgHdr * max_msgs)()
+        base = ctypes.addressof(buffers)
+        for i in range(max_msgs):
+            iovecs[i].iov_base = base + i * RECV_BUFSIZE
+            iovecs[i].iov_len = RECV_BUFSIZE
+            msgs[i].msg_hdr.msg_iov = ctypes.pointer(iovecs[i])
+            msgs[i].msg_hdr.msg_iovlen = 1
+        scratch = _recv_scratch.value = (msgs, buffers, iovecs)
+    return scratch[0]
+
+
+def _recv_each(sock):
+    """Read queued datagrams one recv() at a time until none are left; returns (count, total bytes).
+
+    Relies on `sock` being non-blocking (MSG_DONTWAIT isn't available everywhere).
+    """
+    count = total = 0
+    while True:
+        try:
+            data = sock.recv(RECV_BUFSIZE)
+        except (BlockingIOError, InterruptedError):
+            break
+        count += 1
+        total += len(data)
+    return count, total
+
+
+def drain_responses(sock, max_msgs=64):
+    """Read every datagram already queued on the non-blocking socket `sock`.
+
+    Uses recvmmsg() to collect up to `max_msgs` replies per syscall when
+    available. Payloads are discarded; returns (datagrams read, total bytes).
+    Socket errors other than an empty queue (e.g. ECONNREFUSED) raise OSError.
+    """
+    if _recvmmsg is None or sock.family != socket.AF_INET:
+        return _recv_each(sock)
+
+    msgs = _get_recv_scratch(max_msgs)
+    fd = sock.fileno()
+    count = total = 0
+    while True:
+        received = _recvmmsg(fd, msgs, max_msgs, socket.MSG_DONTWAIT, None)
+        if received < 0:
+            raise_unless_would_block()
+            break  # EAGAIN: the queue is empty
+        if received == 0:
+            break
+        count += received
+        total += sum(msgs[i].msg_len for i in range(received))
+        if received < max_msgs:
+            break
+    return count, total
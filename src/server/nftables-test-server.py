@@ -16,16 +16,19 @@ def main():
     """Main entry point for the NFTables test server."""
     server = NFTablesTestServer()
     
+    # Mode name -> handler; no argument runs the port tests
+    handlers = {
+        'server': server.run_server_mode,
+        'game': lambda: server.run_game_server_mode(int(sys.argv[2]) if len(sys.argv) > 2 else 120),
+    }
+    
     # Check command line arguments
     if len(sys.argv) > 1:
-        if sys.argv[1] == 'server':
-            server.run_server_mode()
-        elif sys.argv[1] == 'game':
-            duration = int(sys.argv[2]) if len(sys.argv) > 2 else 120
-            server.run_game_server_mode(duration)
-        else:
+        handler = handlers.get(sys.argv[1])
+        if handler is None:
             print("Usage: python3 nftables-test-server.py [server|game] [duration_seconds]")
             sys.exit(1)
+        handler()
     else:
         server.run_tests()
 
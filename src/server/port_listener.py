@@ -4,10 +4,60 @@
 Port listener module for handling TCP and UDP connections.
 """
 
+import queue
 import socket
 import sys
+import threading
+import time
 from datetime import datetime
 
+from .server_config import UDP_RCVBUF, UDP_SNDBUF
+from .udp_batch import recv_and_reply
+
+
+# Connection announcements are queued as raw fields and formatted, written and
+# flushed in batches by a logger thread, keeping print() off the serving loop
+_LOG_INTERVAL = 0.1  # seconds
+_log_queue = queue.SimpleQueue()
+_log_write_lock = threading.Lock()  # Keeps batches whole and in order
+_log_thread = None
+_log_thread_lock = threading.Lock()
+
+
+def _log_connection(protocol, port, addr, count):
+    """Queue a 'client connected' line for the logger thread."""
+    global _log_thread
+    _log_queue.put((time.time(), protocol, port, addr[0], addr[1], count))
+    if _log_thread is None:
+        with _log_thread_lock:
+            if _log_thread is None:
+                _log_thread = threading.Thread(target=_write_log, daemon=True)
+                _log_thread.start()
+
+
+def _write_log():
+    """Logger thread: write whatever was queued every _LOG_INTERVAL."""
+    while True:
+        time.sleep(_LOG_INTERVAL)
+        flush_connection_log()
+
+
+def flush_connection_log():
+    """Format and write every queued connection line now, in one write and flush."""
+    with _log_write_lock:
+        entries = []
+        while True:
+            try:
+                entries.append(_log_queue.get_nowait())
+            except queue.Empty:
+                break
+        if not entries:
+            return
+        sys.stdout.write(''.join(
+            f"[{datetime.fromtimestamp(ts)}] Client connected to {protocol}/{port} from {ip}:{src_port} (#{count})\n"
+            for ts, protocol, port, ip, src_port, count in entries))
+        sys.stdout.flush()
+
 
 class PortListener:
     """Handles listening on a specific port for either TCP or UDP traffic."""
@@ -19,11 +69,15 @@ class PortListener:
         self.running = False
         self.connections = 0
         self.packets_received = 0
+        self.acks_dropped = 0  # UDP replies lost to a full send buffer
         self.udp_clients = set()  # Track unique UDP client IPs
         self.client_callback = client_callback  # Callback to report client IPs
+        # Replies are fixed per port, so encode them once
+        self._tcp_reply = f"Hello from nftables test server port {self.port}\n".encode()
+        self._udp_ack = f"ACK from port {self.port}".encode()
 
     def start(self):
-        """Start listening on the configured port and protocol."""
+        """Start listening on the configured port and protocol, serving it until stopped."""
         try:
             if self.protocol == 'tcp':
                 self._start_tcp()
@@ -32,23 +86,59 @@ class PortListener:
         except Exception as e:
             print(f"[{datetime.now()}] Failed to start {self.protocol.upper()} server on port {self.port}: {e}")
 
-    def _start_tcp(self):
-        """Start TCP server and handle connections."""
+    def open(self):
+        """Create and bind the socket for an external event loop, without serving it.
+        
+        The socket is left non-blocking; call handle_ready() each time it becomes
+        readable. Returns False if the socket couldn't be set up.
+        """
+        try:
+            if self.protocol == 'tcp':
+                self._open_tcp()
+            elif self.protocol == 'udp':
+                self._open_udp()
+            else:
+                return False
+            self.socket.setblocking(False)
+            return True
+        except Exception as e:
+            print(f"[{datetime.now()}] Failed to start {self.protocol.upper()} server on port {self.port}: {e}")
+            return False
+
+    def handle_ready(self):
+        """Serve everything waiting on an open()ed socket once it is readable.
+        
+        Returns False if the listener hit an error and should no longer be polled.
+        """
+        try:
+            if self.protocol == 'tcp':
+                self._accept_and_reply()
+            else:
+                self._handle_udp_batch()
+            return True
+        except (BlockingIOError, InterruptedError):
+            return True  # Transient; the selector reports the socket again when it's ready
+        except Exception as e:
+            if self.running:
+                print(f"[{datetime.now()}] {self.protocol.upper()} port {self.port} error: {e}")
+            return False
+
+    def _open_tcp(self):
+        """Create, bind and listen on the TCP socket."""
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.socket.bind(('0.0.0.0', self.port))
         self.socket.listen(5)
         self.running = True
+
+    def _start_tcp(self):
+        """Start TCP server and handle connections."""
+        self._open_tcp()
         
         while self.running:
             try:
                 conn, addr = self.socket.accept()
-                self.connections += 1
-                print(f"[{datetime.now()}] Client connected to TCP/{self.port} from {addr[0]}:{addr[1]} (#{self.connections})")
-                sys.stdout.flush()
-                # Send a simple response
-                conn.send(f"Hello from nftables test server port {self.port}\n".encode())
-                conn.close()
+                self._reply_tcp(conn, addr)
             except socket.timeout:
                 continue
             except Exception as e:
@@ -56,38 +146,80 @@ class PortListener:
                     print(f"[{datetime.now()}] TCP port {self.port} error: {e}")
                 break
 
-    def _start_udp(self):
-        """Start UDP server and handle packets."""
+    def _accept_and_reply(self):
+        """Accept and greet every connection pending on the non-blocking TCP socket."""
+        while True:
+            try:
+                conn, addr = self.socket.accept()
+            except BlockingIOError:
+                return
+            self._reply_tcp(conn, addr)
+
+    def _reply_tcp(self, conn, addr):
+        """Count an accepted TCP connection, greet it and close it."""
+        self.connections += 1
+        _log_connection('TCP', self.port, addr, self.connections)
+        # Send a simple response
+        try:
+            conn.send(self._tcp_reply)
+        except OSError:
+            pass  # Client already reset the connection; not a listener failure
+        finally:
+            conn.close()
+
+    def _open_udp(self):
+        """Create and bind the UDP socket."""
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Room for flood-test bursts that arrive while the previous batch is answered
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RCVBUF)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, UDP_SNDBUF)
+        # Linux reports double the usable size and silently caps it at rmem_max/wmem_max
+        rcvbuf = self.socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        sndbuf = self.socket.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF)
+        print(f"[{datetime.now()}] UDP/{self.port} socket buffers: rcvbuf={rcvbuf} sndbuf={sndbuf} bytes")
         self.socket.bind(('0.0.0.0', self.port))
         self.socket.settimeout(1.0)
         self.running = True
+
+    def _start_udp(self):
+        """Start UDP server and handle packets."""
+        self._open_udp()
         
         while self.running:
             try:
+                # Block (up to the timeout) for the first datagram, then take
+                # everything else already queued in one batched receive/reply
                 _, addr = self.socket.recvfrom(1024)
+                self.socket.sendto(self._udp_ack, addr)
                 self.packets_received += 1
-                
-                # Track new UDP clients
-                client_ip = addr[0]
-                if client_ip not in self.udp_clients:
-                    self.udp_clients.add(client_ip)
-                    self.connections += 1  # Count unique clients as "connections"
-                    print(f"[{datetime.now()}] Client connected to UDP/{self.port} from {addr[0]}:{addr[1]} (#{self.connections})")
-                    sys.stdout.flush()
-                    
-                    # Report client IP to server for shutdown targeting
-                    if self.client_callback:
-                        self.client_callback(client_ip)
-                
-                # Send response back
-                self.socket.sendto(f"ACK from port {self.port}".encode(), addr)
+                self._track_udp_client(addr)
+                self._handle_udp_batch()
             except socket.timeout:
                 continue
             except Exception as e:
                 if self.running:
                     print(f"[{datetime.now()}] UDP port {self.port} error: {e}")
                 break
+
+    def _handle_udp_batch(self):
+        """Answer every datagram already queued on the UDP socket."""
+        sources, dropped = recv_and_reply(self.socket, self._udp_ack)
+        self.packets_received += len(sources)
+        self.acks_dropped += dropped
+        for addr in sources:
+            self._track_udp_client(addr)
+    
+    def _track_udp_client(self, addr):
+        """Record the sender of a UDP datagram, announcing clients not seen before."""
+        client_ip = addr[0]
+        if client_ip not in self.udp_clients:
+            self.udp_clients.add(client_ip)
+            self.connections += 1  # Count unique clients as "connections"
+            _log_connection('UDP', self.port, addr, self.connections)
+            
+            # Report client IP to server for shutdown targeting
+            if self.client_callback:
+                self.client_callback(client_ip)
             
     def stop(self):
         """Stop the listener and close the socket."""
@@ -23,4 +23,8 @@ DEFAULT_UDP_PORTS = [6962, 6963, 9090, 9091, 7787, 19999, 6979, 9696]  # Added 9
 
 # Test connectivity ports (mix of allowed and blocked)
 TEST_TCP_PORTS = [21, 1194, 6567, 22, 80, 443]
-TEST_UDP_PORTS = [6962, 9090, 19999, 53]
\ No newline at end of file
+TEST_UDP_PORTS = [6962, 9090, 19999, 53]
+# Requested UDP listener socket buffer sizes (12 MiB). The kernel caps them at
+# net.core.rmem_max / wmem_max, so raise those sysctls to get the full size
+UDP_RCVBUF = 12 * 1024 * 1024
+UDP_SNDBUF = 12 * 1024 * 1024
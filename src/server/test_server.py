@@ -5,6 +5,7 @@ Main NFTables test server implementation.
 """
 
 import os
+import selectors
 import socket
 import sys
 import threading
@@ -13,7 +14,7 @@ import subprocess
 import json
 from datetime import datetime
 
-from .port_listener import PortListener
+from .port_listener import PortListener, flush_connection_log
 from .server_config import TCP_PORTS, UDP_PORTS, DEFAULT_TCP_PORTS, DEFAULT_UDP_PORTS, TEST_TCP_PORTS, TEST_UDP_PORTS
 
 
@@ -23,6 +24,8 @@ class NFTablesTestServer:
     def __init__(self):
         self.listeners = []
         self.threads = []
+        self.selector = None  # One event loop serves every listener socket
+        self.serving = False
         self.shutdown_broadcast_port = 9999  # Dedicated port for shutdown notifications
         self.connected_clients = set()  # Track connected client IPs
     
@@ -90,32 +93,46 @@ class NFTablesTestServer:
             sys.stdout.flush()
             
     def start_listeners(self):
-        """Start port listeners for TCP and UDP."""
+        """Start port listeners for TCP and UDP, all served by one event loop thread."""
         print(f"[{datetime.now()}] 🚀 Server starting - initializing port listeners...")
         sys.stdout.flush()
         
+        self.selector = selectors.DefaultSelector()
+        
         # Start TCP listeners (limited selection to avoid too many)
         for port in DEFAULT_TCP_PORTS:
             if port in TCP_PORTS:
-                listener = PortListener(port, 'tcp')
-                self.listeners.append(listener)
-                thread = threading.Thread(target=listener.start, daemon=True)
-                thread.start()
-                self.threads.append(thread)
-                time.sleep(0.1)  # Small delay between starts
+                self._add_listener(PortListener(port, 'tcp'))
         
         # Start UDP listeners (selection of game server ports)
         for port in DEFAULT_UDP_PORTS:
             if port in UDP_PORTS:
-                listener = PortListener(port, 'udp', client_callback=self._add_connected_client)
-                self.listeners.append(listener)
-                thread = threading.Thread(target=listener.start, daemon=True)
-                thread.start()
-                self.threads.append(thread)
-                time.sleep(0.1)
+                self._add_listener(PortListener(port, 'udp', client_callback=self._add_connected_client))
+        
+        self.serving = True
+        thread = threading.Thread(target=self._serve_listeners, daemon=True)
+        thread.start()
+        self.threads.append(thread)
                 
         print(f"[{datetime.now()}] ✅ Server STARTED - {len(self.listeners)} port listeners active and ready for connections")
         sys.stdout.flush()
+    
+    def _add_listener(self, listener):
+        """Bind a listener's socket and register it with the event loop."""
+        self.listeners.append(listener)
+        if listener.open():
+            self.selector.register(listener.socket, selectors.EVENT_READ, listener)
+    
+    def _serve_listeners(self):
+        """Event loop: hand each readable listener socket to its listener until shutdown."""
+        while self.serving:
+            for key, _ in self.selector.select(timeout=1.0):
+                listener = key.data
+                if not listener.handle_ready():
+                    # Same as the listener's own loop giving up: stop serving this port
+                    self.selector.unregister(key.fileobj)
+                    listener.stop()
+        self.selector.close()
         
     def test_connectivity(self):
         """Test connectivity to various ports."""        
@@ -168,9 +185,15 @@ class NFTablesTestServer:
         sys.stdout.flush()
         self.broadcast_shutdown()
         
-        # Stop all listeners
+        # Stop the event loop first: closing a socket it is still polling in
+        # select() or serving in handle_ready() races with the loop thread
+        self.serving = False
+        for thread in self.threads:
+            thread.join(timeout=2)
         for listener in self.listeners:
             listener.stop()
+        # Write out connection lines the logger thread hasn't reached yet
+        flush_connection_log()
             
         print(f"[{datetime.now()}] ❌ Server STOPPED - all services terminated")
         sys.stdout.flush()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+"""
+Batched UDP receive-and-reply for the port listeners.
+
+Linux can hand a listener every queued datagram in one recvmmsg(2) call and
+send the replies back in one sendmmsg(2) call, through the ctypes bindings in
+utils.mmsg. On platforms without them every datagram falls back to
+recvfrom() / sendto().
+"""
+
+import ctypes
+import socket
+import threading
+
+try:
+    from ..utils.mmsg import (IOVec, MMsgHdr, SockAddrIn, raise_unless_would_block,
+                              recvmmsg as _recvmmsg, sendmmsg as _sendmmsg)
+except ImportError:  # Loaded as a top-level package, with src/ itself on sys.path
+    from utils.mmsg import (IOVec, MMsgHdr, SockAddrIn, raise_unless_would_block,
+                            recvmmsg as _recvmmsg, sendmmsg as _sendmmsg)
+
+
+RECV_BUFSIZE = 1024
+BATCH_SIZE = 64
+
+# Header arrays built once per thread and reused. Normally that's the server's
+# single event loop thread; listeners run through start() each get their own.
+# Receive and reply headers share the sender address buffers, so the replies
+# go back to exactly the addresses recvmmsg filled in.
+_scratch = threading.local()
+
+
+def _get_scratch(max_msgs):
+    """Return this thread's (recv_msgs, reply_msgs, reply_iov, addrs) for at least max_msgs."""
+    scratch = getattr(_scratch, 'value', None)
+    if scratch is None or len(scratch[0]) < max_msgs:
+        buffers = (ctypes.c_char * (RECV_BUFSIZE * max_msgs))()
+        addrs = (SockAddrIn * max_msgs)()
+        recv_iovecs = (IOVec * max_msgs)()
+        recv_msgs = (MMsgHdr * max_msgs)()
+        reply_msgs = (MMsgHdr * max_msgs)()
+        reply_iov = IOVec()  # Every reply carries the same payload
+        base = ctypes.addressof(buffers)
+        for i in range(max_msgs):
+            recv_iovecs[i].iov_base = base + i * RECV_BUFSIZE
+            recv_iovecs[i].iov_len = RECV_BUFSIZE
+            for msgs in (recv_msgs, reply_msgs):
+                hdr = msgs[i].msg_hdr
+                hdr.msg_name = ctypes.addressof(addrs[i])
+                hdr.msg_namelen = ctypes.sizeof(SockAddrIn)
+            recv_msgs[i].msg_hdr.msg_iov = ctypes.pointer(recv_iovecs[i])
+            recv_msgs[i].msg_hdr.msg_iovlen = 1
+            reply_msgs[i].msg_hdr.msg_iov = ctypes.pointer(reply_iov)
+            reply_msgs[i].msg_hdr.msg_iovlen = 1
+        # buffers/recv_iovecs are referenced only by address; keep them alive here
+        scratch = _scratch.value = (recv_msgs, reply_msgs, reply_iov, addrs, buffers, recv_iovecs)
+    return scratch
+
+
+def _recv_and_reply_each(sock, payload):
+    """Read queued datagrams one recvfrom() at a time until none are left, answering each.
+
+    Returns (sources, dropped) like recv_and_reply().
+    """
+    sources = []
+    dropped = 0
+    while True:
+        try:
+            _data, addr = sock.recvfrom(RECV_BUFSIZE, socket.MSG_DONTWAIT)
+        except (BlockingIOError, InterruptedError):
+            break
+        dropped += _send_reply(sock, payload, addr)
+        sources.append(addr)
+    return sources, dropped
+
+
+def _send_reply(sock, payload, addr):
+    """sendto() one reply; returns 1 if it was dropped because the send buffer is full."""
+    try:
+        sock.sendto(payload, addr)
+    except (BlockingIOError, InterruptedError):
+        return 1  # Lost like any other UDP datagram; the listener keeps serving
+    return 0
+
+
+def recv_and_reply(sock, payload, max_msgs=BATCH_SIZE):
+    """Read every datagram already queued on `sock` and send `payload` back to each sender.
+
+    Never blocks waiting for traffic. Uses one recvmmsg() and one sendmmsg()
+    per batch of up to `max_msgs` datagrams when available. Replies that don't
+    fit in a full send buffer are dropped, not raised. Payloads received are
+    discarded; returns (sources, dropped): the list of (ip, port) senders, one
+    per datagram, and the number of replies dropped. Receive errors other than
+    an empty queue raise OSError.
+    """
+    if _recvmmsg is None or _sendmmsg is None or sock.family != socket.AF_INET:
+        return _recv_and_reply_each(sock, payload)
+
+    recv_msgs, reply_msgs, reply_iov, addrs = _get_scratch(max_msgs)[:4]
+    payload_buf = ctypes.c_char_p(payload)  # Points at the bytes object's buffer, no copy
+    reply_iov.iov_base = ctypes.cast(payload_buf, ctypes.c_void_p)
+    reply_iov.iov_len = len(payload)
+    addr_len = ctypes.sizeof(SockAddrIn)
+    fd = sock.fileno()
+    sources = []
+    dropped = 0
+    while True:
+        for i in range(max_msgs):
+            recv_msgs[i].msg_hdr.msg_namelen = addr_len  # Value-result: reset before each call
+        received = _recvmmsg(fd, recv_msgs, max_msgs, socket.MSG_DONTWAIT, None)
+        if received < 0:
+            raise_unless_would_block()
+            break  # EAGAIN: the queue is empty
+        if received == 0:
+            break
+        batch = [(socket.inet_ntoa(bytes(addrs[i].sin_addr)), socket.ntohs(addrs[i].sin_port))
+                 for i in range(received)]
+        sent = _sendmmsg(fd, reply_msgs, received, 0)
+        if sent < 0:
+            sent = 0
+        for addr in batch[sent:]:
+            dropped += _send_reply(sock, payload, addr)  # Whatever the kernel didn't take in one call
+        sources.extend(batch)
+        if received < max_msgs:
+            break
+    return sources, dropped
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+"""
+ctypes bindings for Linux sendmmsg(2) / recvmmsg(2).
+
+The socket module has no wrapper for either call. The structures and libc
+functions here are shared by the client's burst sender and the server's
+listeners. sendmmsg / recvmmsg are None on platforms that don't provide them,
+and callers fall back to one sendto() / recvfrom() per datagram.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+
+
+class IOVec(ctypes.Structure):
+    """struct iovec"""
+    _fields_ = [
+        ('iov_base', ctypes.c_void_p),
+        ('iov_len', ctypes.c_size_t),
+    ]
+
+
+class MsgHdr(ctypes.Structure):
+    """struct msghdr"""
+    _fields_ = [
+        ('msg_name', ctypes.c_void_p),
+        ('msg_namelen', ctypes.c_uint32),
+        ('msg_iov', ctypes.POINTER(IOVec)),
+        ('msg_iovlen', ctypes.c_size_t),
+        ('msg_control', ctypes.c_void_p),
+        ('msg_controllen', ctypes.c_size_t),
+        ('msg_flags', ctypes.c_int),
+    ]
+
+
+class MMsgHdr(ctypes.Structure):
+    """struct mmsghdr"""
+    _fields_ = [
+        ('msg_hdr', MsgHdr),
+        ('msg_len', ctypes.c_uint),
+    ]
+
+
+class SockAddrIn(ctypes.Structure):
+    """struct sockaddr_in"""
+    _fields_ = [
+        ('sin_family', ctypes.c_ushort),
+        ('sin_port', ctypes.c_uint16),  # Network byte order
+        ('sin_addr', ctypes.c_ubyte * 4),
+        ('sin_zero', ctypes.c_ubyte * 8),
+    ]
+
+
+def load_libc_func(name, argtypes):
+    """Return the named libc function, or None if this platform doesn't provide it."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        func = getattr(libc, name)
+    except (OSError, AttributeError, TypeError):
+        return None
+    func.argtypes = argtypes
+    func.restype = ctypes.c_int
+    return func
+
+
+sendmmsg = load_libc_func(
+    'sendmmsg', [ctypes.c_int, ctypes.POINTER(MMsgHdr), ctypes.c_uint, ctypes.c_int])
+recvmmsg = load_libc_func(
+    'recvmmsg', [ctypes.c_int, ctypes.POINTER(MMsgHdr), ctypes.c_uint, ctypes.c_int, ctypes.c_void_p])
+
+# errno values after a -1 return that only mean "nothing to do right now"
+_WOULD_BLOCK = frozenset((errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR))
+
+
+def raise_unless_would_block():
+    """Raise OSError for the errno left by a failed sendmmsg/recvmmsg call.
+
+    Returns quietly if the call only would have blocked or was interrupted.
+    """
+    err = ctypes.get_errno()
+    if err not in _WOULD_BLOCK:
+        raise OSError(err, os.strerror(err))
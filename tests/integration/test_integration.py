@@ -6,6 +6,7 @@ These tests verify that different components work together correctly.
 
 import unittest
 from unittest.mock import Mock, patch, MagicMock
+import asyncio
 import os
 import sys
 import json
@@ -36,9 +37,13 @@ class TestClientServerIntegration(unittest.TestCase):
             'UT_MAX_NETSPEED': '100000'
         }
         
+        # Created before any socket.socket patch, which would break the loop's self-pipe
+        self.loop = asyncio.new_event_loop()
+        
     def tearDown(self):
         """Clean up test fixtures."""
         import shutil
+        self.loop.close()
         shutil.rmtree(self.temp_dir, ignore_errors=True)
     
     @patch('socket.socket')
@@ -67,7 +72,7 @@ class TestClientServerIntegration(unittest.TestCase):
             server_listener = PortListener(21, 'tcp')
             
             # Test client TCP connection (this method doesn't return success, it updates stats)
-            client._test_tcp_connection()
+            self.loop.run_until_complete(client._test_tcp_connection())
             
             # Verify client recorded the connection or failure (mock will make it succeed)
             # Since we're mocking socket operations, connection should succeed
@@ -2,18 +2,25 @@
 
 
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
+import asyncio
+import ctypes
+import errno
 import os
+import re
 import sys
 import socket
+import struct
 import threading
 import time
 
 # Add src to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
-from client.player_stats import PlayerStats
+from client.player_stats import PlayerStats, MAX_HISTORY_KEPT
 from client.game_client import GameClient
+from client.udp_batch import send_batch, drain_responses
+from client.client_manager import GameClientManager
 
 
 class TestPlayerStats(unittest.TestCase):
@@ -81,11 +88,24 @@ class TestPlayerStats(unittest.TestCase):
     
     def test_record_error(self):
         """Test simulating errors."""
-        self.player_stats.errors.append("Test error 1")
+        self.player_stats.record_error("Test error 1")
         self.assertEqual(len(self.player_stats.errors), 1)
         
-        self.player_stats.errors.append("Test error 2")
+        self.player_stats.record_error("Test error 2")
         self.assertEqual(len(self.player_stats.errors), 2)
+        self.assertEqual(self.player_stats.error_count, 2)
+    
+    def test_record_error_keeps_most_recent(self):
+        """Test that only the most recent messages are kept but all are counted."""
+        for i in range(25):
+            self.player_stats.record_error(f"error {i}")
+        
+        self.assertEqual(self.player_stats.error_count, 25)
+        self.assertEqual(list(self.player_stats.errors), [f"error {i}" for i in range(15, 25)])
+        
+        stats_dict = self.player_stats.get_stats_dict()
+        self.assertEqual(stats_dict['error_count'], 25)
+        self.assertEqual(stats_dict['errors'], [f"error {i}" for i in range(15, 25)])
     
     def test_record_ping(self):
         """Test recording ping times."""
@@ -95,6 +115,51 @@ class TestPlayerStats(unittest.TestCase):
         
         self.player_stats.record_ping(15.2)
         self.assertEqual(len(self.player_stats.ping_times), 2)
+        
+        # Running aggregates track every sample
+        self.player_stats.record_ping(8.0)
+        stats = self.player_stats.get_stats_dict()
+        self.assertEqual(stats['ping_min_ms'], 8.0)
+        self.assertEqual(stats['ping_max_ms'], 15.2)
+        self.assertAlmostEqual(stats['ping_avg_ms'], (10.5 + 15.2 + 8.0) / 3)
+        self.assertEqual(stats['ping_count'], 3)
+    
+    def test_ping_history_is_capped(self):
+        """Test that ping history keeps only recent samples while aggregates cover all."""
+        total = MAX_HISTORY_KEPT + 10
+        for i in range(total):
+            self.player_stats.record_ping(float(i))
+        
+        self.assertLessEqual(len(self.player_stats.ping_times), MAX_HISTORY_KEPT)
+        self.assertEqual(len(self.player_stats.ping_times), len(self.player_stats.ping_timestamps))
+        self.assertEqual(self.player_stats.ping_times[-1], float(total - 1))  # Newest kept
+        
+        stats = self.player_stats.get_stats_dict()
+        self.assertEqual(stats['ping_count'], total)
+        self.assertEqual(stats['ping_min_ms'], 0.0)
+        self.assertEqual(stats['ping_avg_ms'], (total - 1) / 2)
+    
+    @patch('client.player_stats.time.time')
+    def test_history_reported_as_dicts(self, mock_time):
+        """Test that ping and throughput series are reported in the dashboard's dict form."""
+        start = self.player_stats.start_time
+        mock_time.return_value = start + 2.0
+        self.player_stats.record_ping(10.5)
+        self.player_stats.udp_packets_sent = 40
+        self.player_stats.total_bytes_sent = 4000
+        self.player_stats.record_throughput_snapshot()
+        mock_time.return_value = start + 4.0
+        self.player_stats.udp_packets_sent = 100
+        self.player_stats.total_bytes_sent = 10000
+        self.player_stats.record_throughput_snapshot()
+        
+        stats = self.player_stats.get_stats_dict()
+        
+        self.assertEqual(stats['ping_history'], [{'timestamp': 2.0, 'ping_ms': 10.5}])
+        self.assertEqual(stats['throughput_history'], [
+            {'timestamp': 2.0, 'packets_per_sec': 20.0, 'total_packets': 40, 'total_bytes': 4000},
+            {'timestamp': 4.0, 'packets_per_sec': 30.0, 'total_packets': 100, 'total_bytes': 10000},
+        ])
     
     def test_get_stats_dict(self):
         """Test getting statistics as dictionary."""
@@ -142,9 +207,22 @@ class TestGameClient(unittest.TestCase):
             player_id=self.player_id,
             server_ip=self.server_ip
         )
+        
+        # Created before any socket.socket patch, which would break the loop's self-pipe
+        self.loop = asyncio.new_event_loop()
+        
+        # Resolve "test-server" the way simulate_game_traffic does, without real DNS
+        with patch.object(self.loop, 'getaddrinfo', AsyncMock(return_value=self._addrinfo('10.0.0.5'))):
+            self.loop.run_until_complete(self.game_client._resolve_server())
+    
+    @staticmethod
+    def _addrinfo(ip):
+        """getaddrinfo() result for a single IPv4 address."""
+        return [(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP, '', (ip, 0))]
     
     def tearDown(self):
         """Clean up test fixtures."""
+        self.loop.close()
         self.env_patcher.stop()
     
     def test_initialization(self):
@@ -189,63 +267,100 @@ class TestGameClient(unittest.TestCase):
         self.assertIn(21, self.game_client.tcp_ports)
         self.assertIn(19999, self.game_client.tcp_ports)
     
-    @patch('client.game_client.time.time')
+    @patch('client.game_client.time.monotonic_ns')
     @patch('socket.socket')
     def test_ping_server_success(self, mock_socket_class, mock_time):
         """Test successful ping to server."""
         mock_socket = Mock()
         mock_socket_class.return_value = mock_socket
-        mock_socket.recvfrom.return_value = (b"pong", ('127.0.0.1', 9696))
+        mock_socket.recvmsg.return_value = (b"pong", [], 0, ('127.0.0.1', 9696))  # No kernel timestamp
+        mock_socket.recv.side_effect = BlockingIOError  # No stale replies queued
         
-        # Mock time to return consistent values for RTT calculation
-        # Called for: message creation, start time, end time, and potentially stats timestamp
-        mock_time.side_effect = [1000.0, 1000.0, 1000.01, 1000.01]  # 10ms ping
+        # Mock the monotonic clock to return consistent values for RTT calculation
+        # Called for: start time, end time
+        mock_time.side_effect = [1000_000_000_000, 1000_010_000_000]  # 10ms ping
             
-        self.game_client.ping_server(count=1)
+        self.loop.run_until_complete(self.game_client.ping_server(count=1))
             
         # Check that ping was recorded
         self.assertEqual(len(self.game_client.stats.ping_times), 1)
         self.assertAlmostEqual(self.game_client.stats.ping_times[0], 10.0, places=1)
+        
+        # Binary ping payload: magic, the send-time reading, then the player id
+        payload = mock_socket.sendto.call_args[0][0]
+        self.assertEqual(struct.unpack_from('<IQ', payload), (0xDEADBEEF, 1000_000_000_000))
+        self.assertEqual(payload[12:], b"1")
+    
+    @patch('client.game_client.time.monotonic_ns')
+    def test_ping_server_kernel_timestamp(self, mock_time):
+        """Test the kernel receive timestamp is used when it lies within the monotonic RTT."""
+        mock_time.side_effect = [1000_000_000_000, 1000_010_000_000]  # 10ms around the await
+        probe = AsyncMock(return_value=(5_000_000_000, 5_004_000_000))  # 4ms wall clock
+        
+        with patch.object(self.game_client, '_probe', probe):
+            self.loop.run_until_complete(self.game_client.ping_server(count=1))
+        
+        self.assertAlmostEqual(self.game_client.stats.ping_times[0], 4.0, places=1)
+    
+    @patch('client.game_client.time.monotonic_ns')
+    def test_ping_server_ignores_wall_clock_step(self, mock_time):
+        """Test a kernel RTT inflated by a wall-clock step falls back to the monotonic RTT."""
+        mock_time.side_effect = [1000_000_000_000, 1000_010_000_000]  # 10ms around the await
+        probe = AsyncMock(return_value=(5_000_000_000, 6_000_000_000))  # Clock stepped 1s forward
+        
+        with patch.object(self.game_client, '_probe', probe):
+            self.loop.run_until_complete(self.game_client.ping_server(count=1))
+        
+        self.assertAlmostEqual(self.game_client.stats.ping_times[0], 10.0, places=1)
     
     @patch('socket.socket')
     def test_ping_server_failure(self, mock_socket_class):
         """Test ping failure (timeout)."""
         mock_socket = Mock()
         mock_socket_class.return_value = mock_socket
-        mock_socket.recvfrom.side_effect = socket.timeout("Timeout")
+        mock_socket.recvmsg.side_effect = socket.timeout("Timeout")
+        mock_socket.recv.side_effect = BlockingIOError  # No stale replies queued
         
-        self.game_client.ping_server(count=1)
+        self.loop.run_until_complete(self.game_client.ping_server(count=1))
         
         # Ping failures still might record some data, so just verify method was called
         mock_socket.sendto.assert_called()
-        mock_socket.recvfrom.assert_called()
+        mock_socket.recvmsg.assert_called()
+        # Failed pings are counted, not stored as samples
+        self.assertEqual(len(self.game_client.stats.ping_times), 0)
+        self.assertEqual(self.game_client.stats.ping_failures, 1)
     
     @patch('socket.socket')
     def test_tcp_connection_test_success(self, mock_socket_class):
         """Test TCP connection testing."""
         mock_socket = Mock()
         mock_socket_class.return_value = mock_socket
-        mock_socket.connect_ex.return_value = 0  # Success
+        mock_socket.connect.return_value = None  # Success
+        mock_socket.send.return_value = 12  # Bytes the kernel accepted
         
         # Call the actual method that exists
-        self.game_client._test_tcp_connection()
+        self.loop.run_until_complete(self.game_client._test_tcp_connection())
         
         # Verify socket operations were called
-        mock_socket.connect_ex.assert_called()
+        mock_socket.connect.assert_called()
+        self.assertEqual(self.game_client.stats.tcp_connections, 1)
         mock_socket.send.assert_called()
+        self.assertEqual(self.game_client.stats.total_bytes_sent, 12)
         mock_socket.close.assert_called()
+        # Closed with an immediate reset so test connections don't pile up in TIME_WAIT
+        mock_socket.setsockopt.assert_any_call(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
     
     @patch('socket.socket')
     def test_tcp_connection_test_failure(self, mock_socket_class):
         """Test TCP connection test failure."""
         mock_socket = Mock()
         mock_socket_class.return_value = mock_socket
-        mock_socket.connect_ex.return_value = 1  # Connection failed
+        mock_socket.connect.side_effect = ConnectionRefusedError()  # Connection failed
         
         initial_failed = self.game_client.stats.tcp_failed
         
         # This should handle the error gracefully
-        self.game_client._test_tcp_connection()
+        self.loop.run_until_complete(self.game_client._test_tcp_connection())
         
         # Verify failure was recorded
         self.assertEqual(self.game_client.stats.tcp_failed, initial_failed + 1)
@@ -259,15 +374,317 @@ class TestGameClient(unittest.TestCase):
         mock_socket.sendto.return_value = 100
         
         # Test the actual UDP sending method that exists  
-        test_data = "test packet data"  # Method expects string, not bytes
+        test_data = b"test packet data"  # Packets are pre-encoded bytes
         initial_udp_count = self.game_client.stats.udp_packets_sent
         
         self.game_client._send_udp_packet(6567, test_data)
         
         # Verify socket operations and stats
-        mock_socket.sendto.assert_called_with(test_data.encode(), (self.game_client.server_ip, 6567))
-        mock_socket.close.assert_called()
+        # Created non-blocking by socket() itself (no separate setblocking call)
+        mock_socket_class.assert_called_once_with(socket.AF_INET, socket.SOCK_DGRAM | socket.SOCK_NONBLOCK)
+        mock_socket.setblocking.assert_not_called()
+        mock_socket.setsockopt.assert_any_call(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 * 1024 * 1024)
+        mock_socket.setsockopt.assert_any_call(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        mock_socket.sendto.assert_called_with(test_data, ('10.0.0.5', 6567))  # server_ip resolved in setUp
         self.assertEqual(self.game_client.stats.udp_packets_sent, initial_udp_count + 1)
+        
+        # The socket is kept open and reused for subsequent packets
+        mock_socket.close.assert_not_called()
+        self.game_client._send_udp_packet(6962, test_data)
+        self.assertEqual(mock_socket_class.call_count, 1)
+        self.assertEqual(self.game_client.stats.udp_packets_sent, initial_udp_count + 2)
+        
+        # close() releases it
+        self.game_client.close()
+        mock_socket.close.assert_called_once()
+    
+    @patch('socket.socket')
+    def test_send_udp_error_reopens_socket(self, mock_socket_class):
+        """Test that a send error discards the UDP socket and the next send opens a new one."""
+        broken, fresh = Mock(), Mock()
+        broken.sendto.side_effect = OSError("Network is unreachable")
+        mock_socket_class.side_effect = [broken, fresh]
+        
+        self.game_client._send_udp_packet(6567, b"data")
+        self.assertEqual(self.game_client.stats.error_count, 1)
+        broken.close.assert_called_once()
+        
+        self.game_client._send_udp_packet(6567, b"data")
+        fresh.sendto.assert_called_once()
+        self.assertEqual(self.game_client.stats.udp_packets_sent, 1)
+    
+    def test_generate_ut_packet_data(self):
+        """Test that every packet type is built as bytes tagged with the player id."""
+        for packet_type, tag in [('move', b"\\move\\"), ('fire', b"\\fire\\"),
+                                 ('state_update', b"\\state\\"), ('weapon_switch', b"\\weapon\\"),
+                                 ('player_update', b"\\player\\")]:
+            data = self.game_client._generate_ut_packet_data(packet_type)
+            self.assertIsInstance(data, bytes)
+            self.assertTrue(data.startswith(tag + b"id1\\time"), data)
+    
+    def test_probe_ignores_stale_and_foreign_replies(self):
+        """Test that a probe only completes on a fresh reply from the probed port."""
+        probed = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        other = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            probed.bind(('127.0.0.1', 0))
+            other.bind(('127.0.0.1', 0))
+            self.game_client.server_ip = '127.0.0.1'
+            probe_sock = self.game_client._get_probe_socket()
+            probe_sock.bind(('127.0.0.1', 0))
+            port = probed.getsockname()[1]
+            
+            # A stale reply already queued, then a reply from another port mid-wait
+            probed.sendto(b"ACK stale", probe_sock.getsockname())
+            time.sleep(0.05)
+            self.loop.call_later(0.05, other.sendto, b"ACK other", probe_sock.getsockname())
+            with self.assertRaises(TimeoutError):
+                self.loop.run_until_complete(self.game_client._probe(port, b"ping", 0.2))
+            
+            # A fresh reply from the probed port completes the probe
+            self.loop.call_later(0.05, probed.sendto, b"ACK", probe_sock.getsockname())
+            send_ns, rx_ns = self.loop.run_until_complete(self.game_client._probe(port, b"ping", 1.0))
+            # Linux stamps the reply on arrival (SO_TIMESTAMPNS)
+            if sys.platform.startswith('linux'):
+                self.assertIsNotNone(rx_ns)
+                self.assertGreaterEqual(rx_ns, send_ns)
+        finally:
+            self.game_client.close()
+            probed.close()
+            other.close()
+    
+    def test_probe_any_returns_first_responding_port(self):
+        """Test that probing several ports at once completes on whichever port answers."""
+        silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        responder = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            silent.bind(('127.0.0.1', 0))
+            responder.bind(('127.0.0.1', 0))
+            responder.setblocking(False)
+            self.game_client.server_ip = '127.0.0.1'
+            ports = (silent.getsockname()[1], responder.getsockname()[1])
+            
+            def answer():
+                _data, addr = responder.recvfrom(1024)
+                responder.sendto(b"ACK", addr)
+            self.loop.add_reader(responder.fileno(), answer)
+            
+            start = time.monotonic()
+            port, _send_ns, _rx_ns = self.loop.run_until_complete(
+                self.game_client._probe_any(ports, b"alive", 1.0))
+            self.assertEqual(port, ports[1])
+            # The silent port is not waited out first
+            self.assertLess(time.monotonic() - start, 0.5)
+            # Both ports were sent the probe
+            self.assertEqual(silent.recv(1024), b"alive")
+        finally:
+            self.loop.remove_reader(responder.fileno())
+            self.game_client.close()
+            silent.close()
+            responder.close()
+    
+    def test_shutdown_listener_on_event_loop(self):
+        """Test that SERVER_SHUTDOWN is picked up by the event loop reader and the listener stops."""
+        async def notify_shutdown():
+            self.game_client.start_shutdown_listener()
+            port = self.game_client.shutdown_socket.getsockname()[1]
+            sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                sender.sendto(b"SERVER_SHUTDOWN", ('127.0.0.1', port))
+                for _ in range(100):
+                    if self.game_client.received_shutdown:
+                        break
+                    await asyncio.sleep(0.01)
+            finally:
+                sender.close()
+        
+        self.loop.run_until_complete(notify_shutdown())
+        
+        self.assertTrue(self.game_client.received_shutdown)
+        self.assertIsNone(self.game_client.shutdown_socket)
+    
+    @patch('socket.socket')
+    def test_send_udp_full_buffer_counts_only_sent(self, mock_socket_class):
+        """Test that packets dropped on a full send buffer aren't counted as sent."""
+        mock_socket = Mock()
+        mock_socket_class.return_value = mock_socket
+        mock_socket.sendto.side_effect = [None, BlockingIOError(), BlockingIOError()]
+        
+        self.game_client._send_udp_batch(6962, [b"aa", b"bbb", b"c"])
+        self.game_client._send_udp_packet(6962, b"dddd")
+        
+        self.assertEqual(self.game_client.stats.udp_packets_sent, 1)
+        self.assertEqual(self.game_client.stats.total_bytes_sent, 2)
+        self.assertEqual(self.game_client.stats.error_count, 2)
+        self.assertIn("2 packets dropped", self.game_client.stats.errors[0])
+    
+    def test_execute_game_activity_dispatch(self):
+        """Test that each activity runs its handler, awaiting the async ones."""
+        handlers = {
+            'query': '_send_server_query', 'join': '_attempt_server_join',
+            'gameplay': '_send_gameplay_packets', 'heartbeat': '_send_heartbeat',
+            'tcp_test': '_test_tcp_connection',
+        }
+        for activity, name in handlers.items():
+            client = GameClient(1, "test-server")
+            self.assertEqual(client._activity_dispatch[activity], getattr(client, name))
+            is_async = asyncio.iscoroutinefunction(getattr(client, name))
+            handler = AsyncMock() if is_async else Mock(return_value=None)
+            client._activity_dispatch[activity] = handler
+            
+            self.loop.run_until_complete(client._execute_game_activity(activity))
+            
+            if is_async:
+                handler.assert_awaited_once()
+            else:
+                handler.assert_called_once()
+    
+    @patch('builtins.print')
+    def test_log_prints_only_shutdown_related_messages(self, mock_print):
+        """Test that log() filters out routine messages, case-insensitively."""
+        self.game_client.log("Ping to port 9696: 1.00ms")
+        mock_print.assert_not_called()
+        
+        self.game_client.log("Server appears to be DOWN")
+        mock_print.assert_called_once()
+        self.assertIn("Player 1: Server appears to be DOWN", mock_print.call_args[0][0])
+    
+    def test_drain_udp_responses(self):
+        """Test that queued server ACKs are read and counted as received bytes."""
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            server.bind(('127.0.0.1', 0))
+            server.settimeout(1.0)
+            self.game_client.server_ip = '127.0.0.1'
+            self.loop.run_until_complete(self.game_client._resolve_server())  # Numeric: no DNS
+            self.game_client._send_udp_packet(server.getsockname()[1], b"test packet")
+            _, client_addr = server.recvfrom(1024)
+            for _ in range(3):
+                server.sendto(b"ACK from port 6962", client_addr)
+            time.sleep(0.05)
+            
+            self.game_client._drain_udp_responses()
+            
+            self.assertEqual(self.game_client.stats.total_bytes_received, 3 * len(b"ACK from port 6962"))
+            self.assertIsNotNone(self.game_client._last_reply_ns)
+            self.assertEqual(self.game_client.stats.error_count, 0)
+        finally:
+            self.game_client.close()
+            server.close()
+    
+    def test_check_server_status_skips_probe_after_recent_reply(self):
+        """Test that a fresh server ACK stands in for the availability probe."""
+        self.game_client.is_server_available = AsyncMock(return_value=False)
+        now = time.monotonic_ns()
+        
+        self.game_client._last_reply_ns = now - 100_000_000
+        failures = self.loop.run_until_complete(self.game_client._check_server_status(1, 2, now, now))
+        self.assertEqual(failures, 0)
+        self.game_client.is_server_available.assert_not_awaited()
+        
+        # Once replies stop, the check probes again
+        self.game_client._last_reply_ns = now - 2 * 1_000_000_000
+        failures = self.loop.run_until_complete(self.game_client._check_server_status(1, 2, now, now))
+        self.assertEqual(failures, 2)
+        self.game_client.is_server_available.assert_awaited_once()
+    
+    @patch('socket.socket')
+    def test_server_query_and_join_ports(self, mock_socket_class):
+        """Test that queries hit two different UT servers and joins a known server."""
+        mock_socket = Mock()
+        mock_socket_class.return_value = mock_socket
+        
+        for _ in range(50):
+            mock_socket.sendto.reset_mock()
+            self.game_client._send_server_query()
+            ports = [c.args[1][1] for c in mock_socket.sendto.call_args_list]
+            self.assertEqual(len(set(ports)), 2)
+            for c in mock_socket.sendto.call_args_list:
+                self.assertEqual(c.args[0], f"\\status\\\\info\\Player{self.game_client.player_id}".encode())
+            self.assertTrue(set(ports) <= set(self.game_client.game_ports['ut_servers']))
+            
+            mock_socket.sendto.reset_mock()
+            self.game_client._attempt_server_join()
+            port = mock_socket.sendto.call_args[0][1][1]
+            self.assertEqual(mock_socket.sendto.call_args[0][0],
+                             f"\\connect\\\\name\\Player{self.game_client.player_id}\\team\\red\\skin\\default".encode())
+            self.assertIn(port, self.game_client.game_ports['ut_servers'] + self.game_client.game_ports['private_servers'])
+    
+    def test_resolve_server_once_per_host(self):
+        """Test that server_ip is resolved once for every port and again only when it changes."""
+        self.assertEqual(self.game_client._dest(7777), ('10.0.0.5', 7777))
+        self.assertEqual(self.game_client._dest(6962), ('10.0.0.5', 6962))
+        
+        lookup = AsyncMock(return_value=self._addrinfo('10.0.0.6'))
+        with patch.object(self.loop, 'getaddrinfo', lookup):
+            self.assertTrue(self.loop.run_until_complete(self.game_client._resolve_server()))
+            lookup.assert_not_called()  # Already resolved
+            
+            self.game_client.server_ip = "other-server"
+            self.assertIsNone(self.game_client._dest(7777))  # Stale until re-resolved
+            self.assertTrue(self.loop.run_until_complete(self.game_client._resolve_server()))
+        
+        self.assertEqual(lookup.call_args.args[0], "other-server")
+        self.assertEqual(self.game_client._dest(7777), ('10.0.0.6', 7777))
+    
+    def test_resolve_server_failure_backs_off(self):
+        """Test that a failed lookup is cached, not retried on every send."""
+        self.game_client.server_ip = "missing-server"
+        lookup = AsyncMock(side_effect=socket.gaierror("Name or service not known"))
+        with patch.object(self.loop, 'getaddrinfo', lookup):
+            self.assertFalse(self.loop.run_until_complete(self.game_client._resolve_server()))
+            self.assertFalse(self.loop.run_until_complete(self.game_client._resolve_server()))
+            lookup.assert_called_once()
+            self.assertEqual(self.game_client.stats.error_count, 1)
+            
+            # Sends are skipped and counted as errors instead of resolving inline
+            with patch('socket.socket') as mock_socket_class:
+                self.game_client._send_udp_packet(7777, b"packet")
+                mock_socket_class.return_value.sendto.assert_not_called()
+            self.assertEqual(self.game_client.stats.error_count, 2)
+            
+            # After the back-off the lookup is tried again
+            self.game_client._resolve_retry_ns = 0
+            self.loop.run_until_complete(self.game_client._resolve_server())
+            self.assertEqual(lookup.call_count, 2)
+    
+    def test_next_randoms_refills_pool(self):
+        """Test that random draws come from the pool and refill it when exhausted."""
+        first = self.game_client._next_randoms(10)
+        self.assertEqual(len(first), 10)
+        pool = self.game_client._rand_pool
+        
+        # Draining past the end swaps in a fresh pool
+        self.game_client._next_randoms(len(pool))
+        self.assertIsNot(self.game_client._rand_pool, pool)
+        self.assertEqual(self.game_client._rand_pos, len(pool))
+    
+    @patch('client.game_client.asyncio.sleep', new_callable=AsyncMock)
+    @patch('socket.socket')
+    def test_send_gameplay_packets_batches_burst(self, mock_socket_class, mock_sleep):
+        """Test that a gameplay burst is sent as one batch and paced once."""
+        mock_socket = Mock()
+        mock_socket_class.return_value = mock_socket
+        
+        self.loop.run_until_complete(self.game_client._send_gameplay_packets())
+        
+        sent = self.game_client.stats.udp_packets_sent
+        self.assertGreaterEqual(sent, 5)
+        self.assertLessEqual(sent, 15)
+        self.assertEqual(mock_socket.sendto.call_count, sent)
+        self.assertEqual(self.game_client.stats.total_bytes_sent,
+                         sum(len(c.args[0]) for c in mock_socket.sendto.call_args_list))
+        # Padding brings every packet to one of the UT payload sizes
+        for c in mock_socket.sendto.call_args_list:
+            self.assertGreaterEqual(len(c.args[0]), self.game_client.ut_default_payload)
+            self.assertLessEqual(len(c.args[0]), self.game_client.ut_max_payload)
+        # The burst's packets share one timestamp, read once per burst
+        stamps = {re.search(rb"\\time(\d+)", c.args[0]).group(1) for c in mock_socket.sendto.call_args_list}
+        self.assertEqual(len(stamps), 1)
+        # One sleep to the burst's deadline, preserving the average tickrate
+        mock_sleep.assert_called_once()
+        self.assertLessEqual(mock_sleep.call_args[0][0], sent * self.game_client.ut_tick_interval)
+        self.assertGreater(mock_sleep.call_args[0][0], sent * self.game_client.ut_tick_interval - 0.05)
     
     def test_running_state(self):
         """Test client running state."""
@@ -297,5 +714,174 @@ class TestGameClient(unittest.TestCase):
         self.assertEqual(stats['total_bytes_sent'], 1000)
 
 
+class TestGameClientManager(unittest.TestCase):
+    """Test cases for GameClientManager reporting."""
+    
+    def setUp(self):
+        """Set up a manager with a few clients carrying known stats."""
+        self.manager = GameClientManager(num_players=3, server_ip="test-server", duration=10, connections_per_player=1)
+        for i in range(3):
+            client = GameClient(f"{i + 1}-1", "test-server")
+            client.stats.tcp_connections += i
+            client.stats.tcp_failed += 1
+            client.stats.udp_packets_sent += 10 * (i + 1)
+            client.stats.udp_responses += 10 * (i + 1)
+            client.stats.total_bytes_sent += 100 * (i + 1)
+            client.stats.record_error(f"error {i}")
+            client.stats.record_ping(float(i + 1))
+            self.manager.clients.append(client)
+    
+    def test_calculate_aggregate_stats(self):
+        """Test that per-client counters and pings are aggregated correctly."""
+        totals = self.manager._calculate_aggregate_stats()
+        
+        self.assertEqual(totals['total_players'], 3)
+        self.assertEqual(totals['total_tcp_connections'], 3)
+        self.assertEqual(totals['total_tcp_failed'], 3)
+        self.assertEqual(totals['total_udp_packets'], 60)
+        self.assertEqual(totals['total_udp_responses'], 60)
+        self.assertEqual(totals['total_bytes_sent'], 600)
+        self.assertEqual(totals['total_errors'], 3)
+        self.assertEqual(totals['ping_min_ms'], 1.0)
+        self.assertEqual(totals['ping_max_ms'], 3.0)
+        self.assertEqual(totals['ping_avg_ms'], 2.0)
+        self.assertEqual(totals['ping_count'], 3)
+    
+    def test_top_players_from_aggregate_pass(self):
+        """Test top players are ranked on the rows collected while aggregating."""
+        players = []
+        self.manager._calculate_aggregate_stats(players)
+        
+        with patch('builtins.print') as mock_print:
+            self.manager._print_top_players(players)
+        
+        lines = [call.args[0] for call in mock_print.call_args_list if call.args]
+        self.assertEqual(lines[1:], ["  Player 3-1: 30 UDP, 2 TCP, 1 errors",
+                                     "  Player 2-1: 20 UDP, 1 TCP, 1 errors",
+                                     "  Player 1-1: 10 UDP, 0 TCP, 1 errors"])
+
+
+class TestUdpBatch(unittest.TestCase):
+    """Test cases for the batched UDP sender."""
+    
+    def test_send_batch_loopback(self):
+        """Test that every payload in a batch arrives intact and in order."""
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            receiver.bind(('127.0.0.1', 0))
+            receiver.settimeout(1.0)
+            payloads = [f"packet-{i}".encode() * (i + 1) for i in range(8)]
+            
+            sent = send_batch(sender, payloads, receiver.getsockname())
+            
+            self.assertEqual(sent, len(payloads))
+            received = [receiver.recvfrom(2048)[0] for _ in payloads]
+            self.assertEqual(received, payloads)
+            
+            # A larger batch grows the reused header arrays
+            payloads = [b"%d" % i for i in range(40)]
+            self.assertEqual(send_batch(sender, payloads, receiver.getsockname()), 40)
+            self.assertEqual([receiver.recvfrom(2048)[0] for _ in payloads], payloads)
+        finally:
+            sender.close()
+            receiver.close()
+    
+    def test_send_batch_fallback(self):
+        """Test per-packet fallback for sockets sendmmsg can't be used with."""
+        mock_socket = Mock()
+        payloads = [b"a", b"bb", b"ccc"]
+        
+        sent = send_batch(mock_socket, payloads, ('127.0.0.1', 6962))
+        
+        self.assertEqual(sent, 3)
+        self.assertEqual([c.args for c in mock_socket.sendto.call_args_list],
+                         [(p, ('127.0.0.1', 6962)) for p in payloads])
+    
+    def test_send_batch_stops_on_full_buffer(self):
+        """Test that a full send buffer ends the batch and reports what was sent."""
+        mock_socket = Mock()
+        mock_socket.sendto.side_effect = [None, None, BlockingIOError(), None]
+        
+        self.assertEqual(send_batch(mock_socket, [b"a", b"b", b"c", b"d"], ('127.0.0.1', 6962)), 2)
+        self.assertEqual(mock_socket.sendto.call_count, 3)
+    
+    def test_send_batch_empty(self):
+        """Test that an empty batch sends nothing."""
+        mock_socket = Mock()
+        self.assertEqual(send_batch(mock_socket, [], ('127.0.0.1', 6962)), 0)
+        mock_socket.sendto.assert_not_called()
+    
+    def test_drain_responses_loopback(self):
+        """Test that queued datagrams are drained without blocking."""
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            receiver.bind(('127.0.0.1', 0))
+            payloads = [b"ACK from port 7777"] * 5
+            for payload in payloads:
+                sender.sendto(payload, receiver.getsockname())
+            time.sleep(0.05)
+            
+            # Smaller batch than queue depth forces more than one batch call
+            self.assertEqual(drain_responses(receiver, max_msgs=2), (5, sum(map(len, payloads))))
+            # Nothing left: returns immediately instead of blocking
+            self.assertEqual(drain_responses(receiver), (0, 0))
+        finally:
+            sender.close()
+            receiver.close()
+
+    
+    def test_drain_responses_raises_socket_errors(self):
+        """Test that a recvmmsg() failure other than an empty queue raises OSError."""
+        def refused(*args):
+            ctypes.set_errno(errno.ECONNREFUSED)
+            return -1
+        
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            with patch('client.udp_batch._recvmmsg', side_effect=refused):
+                with self.assertRaises(ConnectionRefusedError):
+                    drain_responses(sock)
+    
+    def test_drain_responses_empty_queue_is_not_an_error(self):
+        """Test that EAGAIN from recvmmsg() just ends the drain."""
+        def would_block(*args):
+            ctypes.set_errno(errno.EAGAIN)
+            return -1
+        
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            with patch('client.udp_batch._recvmmsg', side_effect=would_block):
+                self.assertEqual(drain_responses(sock), (0, 0))
+    
+    def test_drain_error_is_recorded(self):
+        """Test that a drain failure reaches the client's error stats."""
+        client = GameClient("drain-test", "127.0.0.1")
+        client._udp_sock = Mock()
+        with patch('client.game_client.drain_responses',
+                   side_effect=ConnectionRefusedError(errno.ECONNREFUSED, "Connection refused")):
+            client._drain_udp_responses()
+        
+        self.assertEqual(client.stats.error_count, 1)
+        self.assertIn("UDP drain", client.stats.errors[-1])
+    
+    @patch('client.udp_batch._recvmmsg', None)
+    def test_drain_responses_fallback_uses_nonblocking_socket(self):
+        """Test the per-datagram fallback drains a non-blocking socket without MSG_DONTWAIT."""
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            receiver.bind(('127.0.0.1', 0))
+            receiver.setblocking(False)
+            for _ in range(3):
+                sender.sendto(b"ACK", receiver.getsockname())
+            time.sleep(0.05)
+            
+            # Like the recvmmsg path, max_msgs doesn't cap how much is drained
+            self.assertEqual(drain_responses(receiver, max_msgs=2), (3, 9))
+            self.assertEqual(drain_responses(receiver), (0, 0))
+        finally:
+            sender.close()
+            receiver.close()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -3,21 +3,28 @@
 Unit tests for server components of TUS Firewall Test Suite.
 """
 
+import ctypes
+import errno
 import unittest
 from unittest.mock import Mock, patch, MagicMock
 import os
 import sys
+import selectors
 import socket
 import threading
 import time
 import json
+import queue
 
 # Add src to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
-from server.port_listener import PortListener
+from server.port_listener import PortListener, flush_connection_log, _log_connection
+from datetime import datetime
 from server.server_config import TCP_PORTS, UDP_PORTS, DEFAULT_TCP_PORTS, DEFAULT_UDP_PORTS, TEST_TCP_PORTS, TEST_UDP_PORTS
+from server.server_config import UDP_RCVBUF, UDP_SNDBUF
 from server.test_server import NFTablesTestServer
+from server.udp_batch import recv_and_reply
 
 
 class TestServerConfig(unittest.TestCase):
@@ -82,6 +89,9 @@ class TestPortListener(unittest.TestCase):
         self.assertEqual(listener.connections, 0)
         self.assertEqual(listener.packets_received, 0)
         self.assertFalse(listener.running)
+        # Replies are encoded once per listener
+        self.assertEqual(listener._udp_ack, b"ACK from port 6567")
+        self.assertEqual(listener._tcp_reply, b"Hello from nftables test server port 6567\n")
         
     @patch('socket.socket')
     def test_tcp_listener_setup(self, mock_socket_class):
@@ -125,12 +135,26 @@ class TestPortListener(unittest.TestCase):
         with patch.object(listener, '_start_udp', side_effect=mock_start_udp):
             listener._start_udp()
         
-        # Verify socket configuration calls - UDP doesn't use setsockopt
+        # Verify socket configuration calls
         mock_socket.bind.assert_called_with(('0.0.0.0', 6567))
         mock_socket.settimeout.assert_called_with(1.0)
         # UDP doesn't call listen()
         mock_socket.listen.assert_not_called()
     
+    @patch('socket.socket')
+    def test_udp_socket_buffers(self, mock_socket_class):
+        """Test UDP listener requests the configured socket buffer sizes."""
+        mock_socket = Mock()
+        mock_socket_class.return_value = mock_socket
+        mock_socket.getsockopt.return_value = 425984
+        mock_socket.recvfrom.side_effect = OSError("socket closed")  # End the receive loop
+        
+        listener = PortListener(6567, 'udp')
+        listener._start_udp()
+        
+        mock_socket.setsockopt.assert_any_call(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RCVBUF)
+        mock_socket.setsockopt.assert_any_call(socket.SOL_SOCKET, socket.SO_SNDBUF, UDP_SNDBUF)
+    
     @patch('socket.socket')
     def test_tcp_connection_handling(self, mock_socket_class):
         """Test TCP connection handling."""
@@ -162,6 +186,59 @@ class TestPortListener(unittest.TestCase):
         mock_socket.bind.assert_called_with(('0.0.0.0', 21))
         mock_socket.listen.assert_called_with(5)
     
+    @patch('server.port_listener._log_connection')
+    def test_tcp_reply_queues_log_line(self, mock_log_connection):
+        """Test TCP connections are announced through the log queue, not printed inline."""
+        conn = Mock()
+        listener = PortListener(21, 'tcp')
+        
+        with patch('builtins.print') as mock_print:
+            listener._reply_tcp(conn, ('10.0.0.5', 40000))
+        
+        mock_print.assert_not_called()
+        mock_log_connection.assert_called_once_with('TCP', 21, ('10.0.0.5', 40000), 1)
+        conn.send.assert_called_once_with(b"Hello from nftables test server port 21\n")
+        conn.close.assert_called_once()
+    
+    @patch('socket.socket')
+    def test_tcp_reset_connection_keeps_listener_running(self, mock_socket_class):
+        """Test a client resetting before the greeting doesn't stop the TCP listener."""
+        mock_socket = Mock()
+        mock_socket_class.return_value = mock_socket
+        reset_conn, next_conn = Mock(), Mock()
+        reset_conn.send.side_effect = ConnectionResetError(104, "Connection reset by peer")
+        mock_socket.accept.side_effect = [
+            (reset_conn, ('127.0.0.1', 12345)),
+            (next_conn, ('127.0.0.1', 12346)),
+            OSError("socket closed"),  # End the accept loop
+        ]
+        
+        listener = PortListener(21, 'tcp')
+        listener._start_tcp()
+        
+        self.assertEqual(listener.connections, 2)
+        reset_conn.close.assert_called_once()
+        next_conn.send.assert_called_once()
+    
+    @patch('server.port_listener._log_queue', queue.SimpleQueue())  # Nothing left over from other tests
+    @patch('server.port_listener._log_thread', object())  # Don't start a logger thread for this test
+    def test_flush_connection_log_writes_queued_lines(self):
+        """Test queued connection lines are formatted, written in order and flushed."""
+        stamp = datetime.fromtimestamp(1700000000.25)
+        
+        with patch('sys.stdout') as mock_stdout:
+            with patch('server.port_listener.time.time', return_value=1700000000.25):
+                _log_connection('TCP', 21, ('10.0.0.5', 40000), 1)
+                _log_connection('UDP', 6962, ('10.0.0.6', 50000), 3)
+            flush_connection_log()
+        
+        # A logger thread started by an earlier test may have written part of it
+        written = ''.join(call.args[0] for call in mock_stdout.write.call_args_list)
+        self.assertEqual(written,
+                         f"[{stamp}] Client connected to TCP/21 from 10.0.0.5:40000 (#1)\n"
+                         f"[{stamp}] Client connected to UDP/6962 from 10.0.0.6:50000 (#3)\n")
+        mock_stdout.flush.assert_called()
+    
     @patch('socket.socket')
     def test_udp_packet_handling(self, mock_socket_class):
         """Test UDP packet handling."""
@@ -261,9 +338,101 @@ class TestPortListener(unittest.TestCase):
         mock_socket.settimeout.assert_called_with(1.0)
 
 
+class TestUdpBatch(unittest.TestCase):
+    """Test cases for batched UDP receive and reply."""
+    
+    def test_recv_and_reply_answers_every_queued_datagram(self):
+        """Test that every queued datagram is read and answered in one call."""
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            server.bind(('127.0.0.1', 0))
+            client.bind(('127.0.0.1', 0))
+            client.settimeout(1.0)
+            for i in range(5):
+                client.sendto(b'packet %d' % i, server.getsockname())
+            time.sleep(0.05)
+            
+            sources, dropped = recv_and_reply(server, b'ACK', max_msgs=4)
+            
+            self.assertEqual(sources, [client.getsockname()] * 5)
+            self.assertEqual(dropped, 0)
+            for _ in range(5):
+                self.assertEqual(client.recv(64), b'ACK')
+            # Queue is empty now, so nothing more is read
+            self.assertEqual(recv_and_reply(server, b'ACK'), ([], 0))
+        finally:
+            server.close()
+            client.close()
+
+    
+    @patch('server.udp_batch._recvmmsg', None)
+    def test_recv_and_reply_fallback_answers_every_queued_datagram(self):
+        """Test the per-datagram fallback isn't capped at max_msgs either."""
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            server.bind(('127.0.0.1', 0))
+            client.bind(('127.0.0.1', 0))
+            client.settimeout(1.0)
+            for i in range(5):
+                client.sendto(b'packet %d' % i, server.getsockname())
+            time.sleep(0.05)
+            
+            sources, dropped = recv_and_reply(server, b'ACK', max_msgs=2)
+            
+            self.assertEqual(sources, [client.getsockname()] * 5)
+            self.assertEqual(dropped, 0)
+            for _ in range(5):
+                self.assertEqual(client.recv(64), b'ACK')
+        finally:
+            server.close()
+            client.close()
+    
+    def test_recv_and_reply_raises_socket_errors(self):
+        """Test that a recvmmsg() failure other than an empty queue raises OSError."""
+        def bad_fd(*args):
+            ctypes.set_errno(errno.EBADF)
+            return -1
+        
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            with patch('server.udp_batch._recvmmsg', side_effect=bad_fd):
+                with self.assertRaises(OSError) as ctx:
+                    recv_and_reply(sock, b'ACK')
+        self.assertEqual(ctx.exception.errno, errno.EBADF)
+
 class TestServerIntegration(unittest.TestCase):
     """Integration tests for server components."""
     
+    def test_event_loop_serves_tcp_and_udp_listeners(self):
+        """Test one event loop thread answering both TCP and UDP listeners."""
+        server = NFTablesTestServer()
+        server.selector = selectors.DefaultSelector()
+        tcp_listener = PortListener(0, 'tcp')  # Port 0: let the kernel pick a free port
+        udp_listener = PortListener(0, 'udp')
+        server._add_listener(tcp_listener)
+        server._add_listener(udp_listener)
+        server.serving = True
+        loop = threading.Thread(target=server._serve_listeners, daemon=True)
+        loop.start()
+        try:
+            with socket.create_connection(tcp_listener.socket.getsockname(), timeout=2) as conn:
+                self.assertTrue(conn.recv(64).startswith(b'Hello from nftables test server'))
+            
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as client:
+                client.settimeout(2)
+                client.sendto(b'test packet', ('127.0.0.1', udp_listener.socket.getsockname()[1]))
+                self.assertTrue(client.recv(64).startswith(b'ACK from port'))
+        finally:
+            server.serving = False
+            loop.join(timeout=3)
+            for listener in server.listeners:
+                listener.stop()
+        # Counters are read once the loop thread has finished with them
+        self.assertFalse(loop.is_alive())
+        self.assertEqual(tcp_listener.connections, 1)
+        self.assertEqual(udp_listener.packets_received, 1)
+    
     def test_server_config_port_listener_integration(self):
         """Test integration between server config constants and PortListener."""
         # Test that all configured ports can create listeners
@@ -279,6 +448,68 @@ class TestServerIntegration(unittest.TestCase):
                 self.assertEqual(listener.port, port)
                 self.assertEqual(listener.protocol, 'udp')
     
+    @patch('server.udp_batch._sendmmsg', return_value=1)  # Kernel takes only the first reply
+    def test_full_send_buffer_keeps_udp_listener_registered(self, mock_sendmmsg):
+        """Test a partial batch send with a full send buffer drops ACKs but keeps the port served."""
+        server = NFTablesTestServer()
+        server.selector = selectors.DefaultSelector()
+        listener = PortListener(0, 'udp')
+        server._add_listener(listener)
+        server.selector.unregister = Mock(wraps=server.selector.unregister)
+        real_socket = listener.socket
+        # Every per-address retry finds the send buffer full
+        listener.socket = Mock(wraps=real_socket, family=real_socket.family)
+        listener.socket.sendto.side_effect = BlockingIOError(11, "Resource temporarily unavailable")
+        
+        # Queue the flood before the loop starts so it arrives as one batch
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as client:
+            for _ in range(3):
+                client.sendto(b'flood packet', ('127.0.0.1', real_socket.getsockname()[1]))
+        
+        server.serving = True
+        loop = threading.Thread(target=server._serve_listeners, daemon=True)
+        loop.start()
+        deadline = time.time() + 2
+        while listener.packets_received < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        server.serving = False
+        loop.join(timeout=3)
+        still_running = listener.running
+        listener.stop()
+        
+        self.assertEqual(listener.packets_received, 3)
+        self.assertEqual(listener.acks_dropped, 2)
+        # Never unregistered and stopped as a failed listener
+        server.selector.unregister.assert_not_called()
+        self.assertTrue(still_running)
+    
+    @patch('server.test_server.flush_connection_log')
+    def test_shutdown_flushes_connection_log(self, mock_flush):
+        """Test shutdown writes out queued connection lines once the loop has stopped."""
+        server = NFTablesTestServer()
+        listener = Mock()
+        server.listeners = [listener]
+        
+        with patch.object(server, 'broadcast_shutdown'), patch('builtins.print'):
+            server.shutdown_server()
+        
+        self.assertFalse(server.serving)
+        listener.stop.assert_called_once()
+        mock_flush.assert_called_once()
+    
+    def test_shutdown_joins_event_loop_before_closing_listeners(self):
+        """Test shutdown waits for the event loop thread before closing listener sockets."""
+        server = NFTablesTestServer()
+        calls = Mock()
+        server.threads = [calls.thread]
+        server.listeners = [calls.listener]
+        
+        with patch.object(server, 'broadcast_shutdown'), patch('builtins.print'):
+            server.shutdown_server()
+        
+        self.assertEqual([name for name, _args, _kwargs in calls.mock_calls],
+                         ['thread.join', 'listener.stop'])
+    
     def test_port_statistics_aggregation(self):
         """Test aggregating statistics from multiple port listeners."""
         with patch('socket.socket'):
@@ -3,6 +3,7 @@
 Unit tests for utility components of TUS Firewall Test Suite.
 """
 
+import ctypes
 import unittest
 from unittest.mock import Mock, patch
 import os
@@ -13,6 +14,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
 # Import utilities
 import utils.authentic_ut_specs as ut_specs
+from utils import mmsg
 
 
 class TestAuthenticUTSpecs(unittest.TestCase):
@@ -221,5 +223,21 @@ class TestConfigurationValidation(unittest.TestCase):
         self.assertLessEqual(test_duration, max_duration)
 
 
+
+class TestMMsgBindings(unittest.TestCase):
+    """Test cases for the shared sendmmsg/recvmmsg ctypes bindings."""
+    
+    def test_sockaddr_in_layout(self):
+        """Test struct sockaddr_in matches the kernel's 16-byte layout."""
+        self.assertEqual(ctypes.sizeof(mmsg.SockAddrIn), 16)
+    
+    def test_client_and_server_share_bindings(self):
+        """Test both batch modules use the one set of bindings."""
+        import client.udp_batch
+        import server.udp_batch
+        self.assertIs(client.udp_batch._sendmmsg, mmsg.sendmmsg)
+        self.assertIs(server.udp_batch._recvmmsg, mmsg.recvmmsg)
+        self.assertIs(client.udp_batch.MMsgHdr, server.udp_batch.MMsgHdr)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file